@@ -1,72 +1,715 @@
 import csv
+import codecs
+import gzip
 import json
-import pandas as pd
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 import os
 import re
+import sys
 import requests
-from io import StringIO
-from typing import Dict, List, Any, Optional
+import httpx
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple, Union
 import asyncio
 import threading
+import time
+import queue
+import atexit
 from datetime import datetime, timedelta
+from collections import deque
+from itertools import count
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from io import BytesIO, StringIO
 from conversation_logger import log_bot_question, log_user_answer, log_conversation_event, save_conversation
 
+try:
+    import orjson  # C JSON parser; orjson.JSONDecodeError subclasses json.JSONDecodeError
+    _json_loads = orjson.loads
+    _json_dumps = lambda obj: orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+try:
+    import pyarrow.parquet as pq  # Optional: read Parquet copies of the config tables
+except ImportError:
+    pq = None
+
 # Configuration for logging features
 ENABLE_LATENCY_LOGGING = os.getenv("ENABLE_LATENCY_LOGGING", "true").lower() == "true"
 ENABLE_EXTRACTION_FAILURE_LOGGING = os.getenv("ENABLE_EXTRACTION_FAILURE_LOGGING", "true").lower() == "true"
-MAX_LOGGING_LATENCY_MS = float(os.getenv("MAX_LOGGING_LATENCY_MS", "50"))  # Disable logging if it takes too long
+MAX_LOGGING_LATENCY_MS = float(os.getenv("MAX_LOGGING_LATENCY_MS", "50"))  # Warn when a log write takes longer
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Events buffered before new ones are dropped
+EXTRACTION_FAILURE_SAMPLE_RATE = float(os.getenv("EXTRACTION_FAILURE_SAMPLE", "0.1"))  # Share of failures logged in full
+UPLOAD_RETRY_ATTEMPTS = 3  # PUT attempts per initiatives upload, backing off 1s, 2s between them
+PREVIOUS_INITIATIVES_TTL_S = float(os.getenv("PREVIOUS_INITIATIVES_TTL_S", "30"))  # Revalidate interval for AI_Initiatives.csv
+UPLOAD_DEBOUNCE_MS = int(os.getenv("UPLOAD_DEBOUNCE_MS", "500"))  # Wait for more saves before uploading
+UPLOAD_GZIP = os.getenv("UPLOAD_GZIP", "false").lower() == "true"  # Store AI_Initiatives.csv gzip-encoded (block blobs)
+UPLOAD_POOL_SIZE = int(os.getenv("UPLOAD_POOL_SIZE", "8"))  # Concurrent conversation-log uploads
+RESPONSE_PREVIEW_TOKENS = 30  # Streamed reply tokens handed to TTS before the rest arrives
+HISTORY_SUMMARY_INTERVAL = 20  # Messages (~10 turns) between rolling history summaries
+ENABLE_LLM_BATCHING = os.getenv("ENABLE_LLM_BATCHING", "false").lower() == "true"
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "10"))  # Wait this long for other sessions' calls
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "16"))  # Max calls per abatch()
+
+# Fields cheap enough to extract without the LLM. Each pattern marks the stored value with
+# (?P<value>...) and must be anchored to context naming the field (a budget word, "stage",
+# "currently in"), since a regex hit is stored as-is and the LLM is not asked about it again.
+# A field may list several alternative patterns.
+_BUDGET_UNITS = r"k|m|b|thousand|million|billion"
+_BUDGET_AMOUNT = rf"(?:\$\s?)?\d+(?:\.\d+)?\s*(?:{_BUDGET_UNITS})\b"  # Unit required: "$500" or "2 million" alone is ambiguous
+_BUDGET_WORDS = r"budget(?:ed)?|cost(?:s|ing)?|spend(?:ing)?|funding|funded|investment|invested|allocated"
+_STAGES = r"ideation|proof of concept|POC|prototype|pilot|development|UAT|production"
+DETERMINISTIC_FIELD_PATTERNS = {
+    "Budget": (
+        rf"\b(?:{_BUDGET_WORDS})\b(?:\s+(?:is|was|of|at|about|around|roughly|approximately|are|will be|be))*"
+        rf"\s*:?\s*(?P<value>{_BUDGET_AMOUNT})",
+        rf"(?P<value>{_BUDGET_AMOUNT})\s+(?:(?:in|of)\s+)?(?:budget|funding|investment)\b",
+    ),
+    "Department": (
+        r"\b(?P<value>(?-i:IT|HR)|engineering|marketing|finance|sales|operations|customer service|legal)"
+        r"\s+(?:department|dept|team|group)\b",
+    ),
+    "Current Stage": (
+        rf"\b(?:currently|still|now|we['’]re|we are|it['’]s|it is)\s+(?:in|at)(?:\s+the)?\s+(?P<value>{_STAGES})\b",
+        rf"\b(?:in|at)(?:\s+the)?\s+(?P<value>{_STAGES})\s+(?:stage|phase)\b",
+    ),
+}
+
+def compile_deterministic_extractors(fields: Iterable[str]) -> Tuple[Optional[re.Pattern], Dict[str, str]]:
+    """One regex over the cheap-field patterns of `fields`; returns (pattern, group name -> field)."""
+    groups = {}
+    alternatives = []
+    patterns = ((field, pattern) for field in fields for pattern in DETERMINISTIC_FIELD_PATTERNS.get(field, ()))
+    for i, (field, pattern) in enumerate(patterns):
+        pattern = pattern.replace("(?P<value>", f"(?P<v{i}>")
+        alternatives.append(f"(?P<f{i}>{pattern})")
+        groups[f"f{i}"] = field
+    
+    return (re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None), groups
+
+def match_deterministic_fields(pattern: re.Pattern, groups: Dict[str, str], text: str) -> Dict[str, str]:
+    """First value per field found by a compile_deterministic_extractors pattern in a single scan."""
+    extracted = {}
+    for match in pattern.finditer(text):
+        group = match.lastgroup
+        extracted.setdefault(groups[group], match.group("v" + group[1:]))
+    return extracted
+
+# Budget unit initial -> (multiplier, divisor, format) to standardize amounts in millions.
+# No unit (or "thousand") is treated as thousands.
+_BUDGET_SCALES = {
+    "k": (1, 1000, ".1f"),
+    "t": (1, 1000, ".1f"),
+    "": (1, 1000, ".1f"),
+    "m": (1, 1, ".1f"),
+    "b": (1000, 1, ".0f"),
+}
+_BUDGET_AMOUNT_RE = re.compile(rf"(\d+(?:\.\d+)?)\s*({_BUDGET_UNITS})?", re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def clean_budget_value(value: str) -> Optional[str]:
+    """Standardize a budget string to millions; memoized since amounts repeat heavily in replays."""
+    if not value:
+        return None
+    
+    # Extract numbers and units
+    match = _BUDGET_AMOUNT_RE.search(value)
+    if match:
+        number, unit = match.groups()
+        return _scale_budget(float(number), unit[0].lower() if unit else "")
+    
+    return value
+
+def bulk_clean_budgets(values: Iterable[Any]) -> List[Optional[str]]:
+    """Clean many stored budget values at once (log replay, CSV audits)."""
+    return [clean_budget_value(str(v).strip()) if v else None for v in values]
+
+def _scale_budget(number: float, unit_code: str) -> str:
+    """Format a budget amount in millions from its number and unit initial."""
+    multiplier, divisor, fmt = _BUDGET_SCALES[unit_code]
+    return f"${number * multiplier / divisor:{fmt}}M"
+
+def _compile_phrases(phrases: List[str], whole_words: bool = False) -> re.Pattern:
+    """One case-insensitive regex matching any phrase as a substring (single scan per input)."""
+    pattern = "|".join(map(re.escape, phrases))
+    if whole_words:
+        # "no" shouldn't match "know"/"notice", nor "ok" match "look"
+        pattern = rf"\b(?:{pattern})\b"
+    return re.compile(pattern, re.IGNORECASE)
 
-def safe_log_event(session_id: str, event: str, data: Dict, max_time_ms: float = MAX_LOGGING_LATENCY_MS):
-    """Safely log events with performance budget and proper error handling."""
+# Phrases that mean the user wants the question reworded rather than the template again
+REPHRASE_REQUEST_PHRASES = ["rephrase", "what do you mean", "don't understand", "didn't understand",
+                            "not sure what you mean", "say that again", "another way"]
+_REPHRASE_REQUEST_RE = _compile_phrases(REPHRASE_REQUEST_PHRASES)
+
+# Filler replies that can't carry field data - extraction is skipped for them
+TRIVIAL_INPUTS = frozenset([
+    "ok", "okay", "k", "sure", "yes", "yeah", "yep", "yup", "right", "alright", "cool", "great",
+    "thanks", "thank you", "thanks a lot", "hmm", "hm", "uh", "um", "uh huh", "mhm", "got it", "ok thanks"
+])
+
+# Event logging runs on a background thread so the conversation path only enqueues
+_log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_log_worker_thread: Optional[threading.Thread] = None
+_log_worker_lock = threading.Lock()
+_dropped_log_events = 0
+
+def _log_worker():
+    """Write queued events with log_conversation_event, one at a time."""
+    while True:
+        session_id, event, data = _log_queue.get()
+        log_start = time.perf_counter_ns()
+        try:
+            log_conversation_event(session_id, event, data)
+        except Exception as e:
+            # Log to console but don't fail the main operation
+            print(f"WARNING: Logging failed for {event}: {e}")
+        finally:
+            _log_queue.task_done()
+            log_duration = (time.perf_counter_ns() - log_start) / 1e6
+            if log_duration > MAX_LOGGING_LATENCY_MS:
+                print(f"WARNING: Logging {event} took {log_duration:.1f}ms (max: {MAX_LOGGING_LATENCY_MS}ms)")
+
+def _ensure_log_worker():
+    """Start the logging thread on first use."""
+    global _log_worker_thread
+    with _log_worker_lock:
+        if _log_worker_thread is None:
+            _log_worker_thread = threading.Thread(target=_log_worker, name="survey-agent-logger")
+            _log_worker_thread.daemon = True
+            _log_worker_thread.start()
+
+def safe_log_event(session_id: str, event: str, data: Dict):
+    """Queue an event for background logging; never blocks the caller."""
+    global _dropped_log_events
     if not ENABLE_LATENCY_LOGGING and "latency" in event:
         return
     if not ENABLE_EXTRACTION_FAILURE_LOGGING and "failure" in event:
         return
+    
+    if _log_worker_thread is None:
+        _ensure_log_worker()
+    try:
+        _log_queue.put_nowait((session_id, event, data))
+    except queue.Full:
+        _dropped_log_events += 1  # Logger can't keep up - drop rather than stall the turn
+
+# Extraction failures are sampled so a burst (e.g. an LLM regression) doesn't flood the log
+_FAILURE_SAMPLE_EVERY = max(1, round(1 / max(EXTRACTION_FAILURE_SAMPLE_RATE, 1e-6)))
+_failure_counter = count()
+_unsampled_failures = 0
+
+def log_extraction_failure(session_id: str, data: Dict):
+    """Log every Nth extraction failure in full; the rest are counted into an aggregate event."""
+    global _unsampled_failures
+    if next(_failure_counter) % _FAILURE_SAMPLE_EVERY:
+        _unsampled_failures += 1
+        return
+    
+    if _unsampled_failures:
+        safe_log_event(session_id, "extraction_failure_aggregate", {
+            "unsampled_failures": _unsampled_failures,
+            "sample_rate": EXTRACTION_FAILURE_SAMPLE_RATE
+        })
+        _unsampled_failures = 0
+    safe_log_event(session_id, "extraction_failure", data)
+
+def get_dropped_log_event_count() -> int:
+    """Number of events dropped because the log queue was full."""
+    return _dropped_log_events
+
+def flush_log_events(timeout: float = 5.0):
+    """Wait (bounded) for queued events to be written, e.g. on shutdown."""
+    with _log_queue.all_tasks_done:
+        _log_queue.all_tasks_done.wait_for(lambda: not _log_queue.unfinished_tasks, timeout)
+
+atexit.register(flush_log_events)
+
+
+# Shared event loop for the async LLM calls. Sync callers (worker threads) submit
+# coroutines here so LLM clients stay bound to a single, long-lived loop.
+_agent_loop: Optional[asyncio.AbstractEventLoop] = None
+_agent_loop_lock = threading.Lock()
+
+def _get_agent_loop() -> asyncio.AbstractEventLoop:
+    """Get (or start) the background event loop used for agent coroutines."""
+    global _agent_loop
+    with _agent_loop_lock:
+        if _agent_loop is None:
+            _agent_loop = asyncio.new_event_loop()
+            loop_thread = threading.Thread(target=_agent_loop.run_forever, name="survey-agent-loop")
+            loop_thread.daemon = True
+            loop_thread.start()
+    return _agent_loop
+
+def run_agent_coroutine(coro):
+    """Run an agent coroutine on the shared loop and block until it completes."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_agent_loop()).result()
+
+async def await_agent_coroutine(coro):
+    """Run an agent coroutine on the shared loop and await it without blocking the caller's loop.
+    
+    Cancelling the awaiting task (e.g. on a timeout) cancels the coroutine too.
+    """
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_agent_loop()))
+
+
+class LLMBatcher:
+    """Coalesce concurrent LLM calls from all sessions into one abatch() per model.
+    
+    Lives on the shared agent loop: calls submitted within the batch window are grouped
+    by runnable and sent together, at most max_size per abatch(); a batch is sent as soon
+    as it is full.
+    """
+    
+    def __init__(self, max_size: int = LLM_BATCH_MAX_SIZE, window_ms: float = LLM_BATCH_WINDOW_MS):
+        self.max_size = max_size
+        self.window_s = window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = set()  # Strong refs so running batches aren't garbage collected
+    
+    async def submit(self, runnable, messages):
+        """Queue one call and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._drain())
         
-    log_start = datetime.now()
+        future = loop.create_future()
+        self._queue.put_nowait((runnable, messages, future))
+        return await future
+    
+    async def _drain(self):
+        """Collect queued calls until max_size or the window closes, then dispatch them grouped by runnable."""
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.window_s
+            # A full batch goes out immediately rather than waiting out the window
+            while len(pending) < self.max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            groups: Dict[int, List] = {}
+            for item in pending:
+                groups.setdefault(id(item[0]), []).append(item)
+            for items in groups.values():
+                # Don't hold up the next window on this batch's round trip
+                task = asyncio.create_task(self._run_batch(items))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+    
+    async def _run_batch(self, items: List):
+        """Send one abatch() and hand each caller its own result or error."""
+        runnable = items[0][0]
+        try:
+            results = await runnable.abatch([messages for _, messages, _ in items], return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(items)
+        
+        for (_, _, future), result in zip(items, results):
+            if future.done():
+                continue  # Caller was cancelled (e.g. a discarded speculative reply)
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+_llm_batcher = LLMBatcher() if ENABLE_LLM_BATCHING else None
+
+async def ainvoke_llm(runnable, messages):
+    """Invoke an LLM, coalescing with other sessions' calls when batching is enabled."""
+    if _llm_batcher is not None:
+        return await _llm_batcher.submit(runnable, messages)
+    return await runnable.ainvoke(messages)
+
+
+# Parsed blob downloads keyed by URL: url -> (etag, parsed). Reused across sessions and
+# revalidated with If-None-Match so unchanged blobs are not downloaded or parsed again.
+_BLOB_CACHE: Dict[str, Tuple[Optional[str], Any]] = {}
+_http_session = requests.Session()  # Keep-alive avoids a TLS handshake per download
+# Transient blob errors on reads are retried by the transport; PUTs are retried by
+# InitiativesCSVStore, which also has to handle ETag conflicts
+_blob_read_retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                         allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+_http_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=_blob_read_retry))
+
+# Bounded pool for background blob uploads so a burst of finished sessions can't open hundreds of PUTs
+_upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_POOL_SIZE, thread_name_prefix="blob-upload")
+
+def _fetch_blob(url: str, parse_response: Callable[[requests.Response], Any], timeout: int = 30,
+                stream: bool = False) -> Any:
+    """Download a blob and return parse_response(response), using the ETag cache when possible."""
+    cached = _BLOB_CACHE.get(url)
+    headers = {"If-None-Match": cached[0]} if cached and cached[0] else {}
+    
+    with _http_session.get(url, headers=headers, timeout=timeout, stream=stream) as response:
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        
+        parsed = parse_response(response)
+        _BLOB_CACHE[url] = (response.headers.get("ETag"), parsed)
+        return parsed
+
+def _fetch_csv(url: str, parse: Callable[[Iterable[str]], Any], timeout: int = 30) -> Any:
+    """Download a CSV and return its parsed form, using the ETag cache when possible.
+    
+    The body is streamed: parse() receives decoded lines as they arrive instead of a
+    fully materialized response.text copy.
+    """
+    return _fetch_blob(url, lambda response: parse(codecs.iterdecode(response.iter_lines(), "utf-8-sig")),
+                       timeout, stream=True)
+
+def _fetch_parquet_rows(url: str, timeout: int = 30) -> List[Dict[str, str]]:
+    """Download a Parquet table as row dicts with the same string values as the CSV reader."""
+    def parse(response):
+        table = pq.read_table(BytesIO(response.content))
+        return [{col: "" if val is None else str(val) for col, val in row.items()} for row in table.to_pylist()]
+    return _fetch_blob(url, parse, timeout)
+
+def _parse_csv_rows(lines: Iterable[str]) -> List[Dict[str, str]]:
+    """Parse CSV lines into a list of row dicts."""
+    return list(csv.DictReader(lines))
+
+_blob_async_client: Optional[httpx.AsyncClient] = None  # Only used on the shared agent loop
+
+async def _afetch_csv(url: str, parse: Callable[[Iterable[str]], Any], timeout: int = 30) -> Any:
+    """Async _fetch_csv for the shared agent loop (same ETag cache, pooled keep-alive client)."""
+    global _blob_async_client
+    if _blob_async_client is None:
+        _blob_async_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8), timeout=timeout)
+    
+    cached = _BLOB_CACHE.get(url)
+    headers = {"If-None-Match": cached[0]} if cached and cached[0] else {}
+    response = await _blob_async_client.get(url, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+    
+    parsed = parse(response.content.decode("utf-8-sig").splitlines())
+    _BLOB_CACHE[url] = (response.headers.get("ETag"), parsed)
+    return parsed
+
+
+class InitiativesCSVStore:
+    """Process-wide cached copy of AI_Initiatives.csv with a single background uploader.
+    
+    Saves are queued to a single uploader thread, which applies them to the in-memory rows
+    (downloaded once) and PUTs the latest snapshot; saves arriving within UPLOAD_DEBOUNCE_MS
+    of each other become one upload. Rows are kept as plain lists under a header and
+    serialized with csv.writer. Uploads are conditional on the blob's ETag: if another
+    writer changed it, the blob is reloaded and the saves that weren't uploaded yet are
+    applied again.
+    
+    If the blob is an Append Blob, uploads that only add initiatives send just the new rows
+    (Append Block); a change to an existing row rewrites the blob.
+    """
+    
+    def __init__(self, url: str, columns: List[str]):
+        self.url = url
+        self.columns = list(columns)
+        self._lock = threading.Lock()
+        self._uploaded = threading.Condition(self._lock)
+        self._header: Optional[List[str]] = None  # Loaded on first save
+        self._rows: List[List[Any]] = []  # One list per initiative, in header order
+        self._row_by_name: Dict[str, int] = {}  # Initiative name -> index of its (first) row
+        self._etag: Optional[str] = None
+        self._blob_type: Optional[str] = None  # x-ms-blob-type of the remote blob (None: not created yet)
+        self._remote_rows: Optional[int] = None  # Data rows already in the blob (None: no header either)
+        self._pending_rewrites = 0  # Saves that changed an already-uploaded row (or the header)
+        self._unsaved: List[Dict[str, Any]] = []  # Applied to the cache, not uploaded yet
+        self._queued = 0  # Saves handed to the uploader but not applied yet
+        self._saves: queue.Queue = queue.Queue()
+        
+        worker = threading.Thread(target=self._upload_worker, name="initiatives-csv-uploader")
+        worker.daemon = True
+        worker.start()
+    
+    def save(self, initiative_data: Dict[str, Any]):
+        """Queue one initiative for the uploader (never blocks on the network)."""
+        with self._lock:
+            self._queued += 1
+        self._saves.put(dict(initiative_data))
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait (bounded) until every save has been uploaded."""
+        with self._uploaded:
+            return self._uploaded.wait_for(lambda: not self._unsaved and not self._queued, timeout)
+    
+    def _reload(self):
+        """Download the current blob into the cache (lock held)."""
+        self._pending_rewrites = 0
+        try:
+            response = _http_session.get(self.url, timeout=30)
+            if response.status_code == 200:
+                # Parse the raw bytes (no text decode copy); keep every cell as the text it was written as.
+                # C engine: pyarrow infers numeric types before applying dtype=str (1000 -> "1000.0")
+                df = pd.read_csv(BytesIO(response.content), dtype=str, engine="c")
+                self._header = list(df.columns)
+                self._rows = df.fillna("").values.tolist()
+                self._etag = response.headers.get("ETag")
+                self._blob_type = response.headers.get("x-ms-blob-type")
+                self._remote_rows = len(self._rows)
+                self._index_rows()
+                print(f"DEBUG: Read {len(self._rows)} existing initiatives from Azure Blob")
+                return
+            print(f"DEBUG: No existing initiatives file found, creating new one")
+        except Exception as e:
+            print(f"DEBUG: Error reading from Azure Blob, starting an empty file: {e}")
+        self._header = list(self.columns)
+        self._rows = []
+        self._row_by_name = {}
+        self._etag = None
+        self._blob_type = None
+        self._remote_rows = None
+    
+    def _index_rows(self):
+        """Rebuild the Initiative name -> row index map (lock held)."""
+        self._row_by_name = {}
+        if 'Initiative' in self._header:
+            name_col = self._header.index('Initiative')
+            for i, row in enumerate(self._rows):
+                if row[name_col]:
+                    self._row_by_name.setdefault(row[name_col], i)
+    
+    def _column(self, field: str) -> int:
+        """Index of a field in the header, adding the column if the file doesn't have it yet (lock held)."""
+        try:
+            return self._header.index(field)
+        except ValueError:
+            self._header.append(field)
+            for row in self._rows:
+                row.append("")
+            if self._remote_rows:
+                self._pending_rewrites += 1  # Uploaded rows change shape
+            return len(self._header) - 1
+    
+    def _apply_save(self, initiative_data: Dict[str, Any]):
+        """Update the matching initiative row, or append a new one (lock held)."""
+        initiative_name = initiative_data.get('Initiative')
+        if initiative_name:
+            idx = self._row_by_name.get(initiative_name)
+            if idx is not None:
+                # Update existing initiative
+                print(f"DEBUG: Updating existing initiative: {initiative_name}")
+                row = self._rows[idx]
+                for field, value in initiative_data.items():
+                    if value is not None and value != "":
+                        col = self._column(field)
+                        row[col] = value
+                if self._remote_rows is not None and idx < self._remote_rows:
+                    self._pending_rewrites += 1
+                return
+            print(f"DEBUG: Adding new initiative: {initiative_name}")
+        else:
+            print(f"DEBUG: Adding new initiative without name")
+        
+        for field in initiative_data:
+            self._column(field)
+        self._rows.append([initiative_data.get(field) for field in self._header])
+        if initiative_name:
+            self._row_by_name[initiative_name] = len(self._rows) - 1
+    
+    @staticmethod
+    def _to_csv(header: Optional[List[str]], rows: List[List[Any]]) -> str:
+        """Serialize rows (and the header, if given) as CSV text."""
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if header is not None:
+            writer.writerow(header)
+        writer.writerows(rows)
+        return buffer.getvalue()
+    
+    def _upload_worker(self):
+        """Apply and upload saves as they arrive, one upload per burst."""
+        while True:
+            saves = [self._saves.get()]
+            time.sleep(UPLOAD_DEBOUNCE_MS / 1000)
+            while not self._saves.empty():
+                saves.append(self._saves.get_nowait())
+            try:
+                with self._lock:
+                    if self._header is None:
+                        self._reload()
+                    for initiative_data in saves:
+                        self._apply_save(initiative_data)
+                        self._unsaved.append(initiative_data)
+                self._upload_pending()
+            except Exception as e:
+                print(f"ERROR: Initiatives upload failed: {e}")
+            finally:
+                with self._uploaded:
+                    self._queued -= len(saves)
+                    self._uploaded.notify_all()
+    
+    def _upload_pending(self):
+        """Upload unsaved changes, retrying with exponential backoff."""
+        for attempt in range(UPLOAD_RETRY_ATTEMPTS):
+            with self._lock:
+                if not self._unsaved:
+                    return
+                uploading = len(self._unsaved)
+                rewrites = self._pending_rewrites
+                rows = len(self._rows)
+                etag = self._etag
+                append_only = (self._blob_type == "AppendBlob" and etag and not rewrites
+                               and self._remote_rows is not None)
+                if append_only:
+                    # Only the rows added since the last upload
+                    csv_string = self._to_csv(None, self._rows[self._remote_rows:])
+                else:
+                    csv_string = self._to_csv(self._header, self._rows)
+                print(f"DEBUG: Generated CSV data with {rows} initiatives" + (" (appending new rows)" if append_only else ""))
+            
+            if append_only:
+                upload_response = self._put(self._append_block_url(), csv_string, {"If-Match": etag})
+            elif self._blob_type == "AppendBlob":
+                upload_response = self._rewrite_append_blob(csv_string, etag)
+            else:
+                headers = {
+                    'x-ms-blob-type': 'BlockBlob',
+                    'Content-Type': 'text/csv'
+                }
+                # Only overwrite the version we loaded (or create the blob if there was none)
+                headers["If-Match" if etag else "If-None-Match"] = etag or "*"
+                body = csv_string
+                if UPLOAD_GZIP:
+                    # Stored as the blob's Content-Encoding; requests/httpx readers decompress on GET
+                    body = gzip.compress(csv_string.encode("utf-8"), compresslevel=1)
+                    headers['Content-Encoding'] = 'gzip'
+                upload_response = self._put(self.url, body, headers)
+            
+            if upload_response is not None and upload_response.status_code in [200, 201]:
+                with self._uploaded:
+                    self._etag = upload_response.headers.get("ETag", self._etag)
+                    self._blob_type = self._blob_type or "BlockBlob"
+                    self._remote_rows = rows
+                    self._pending_rewrites -= rewrites
+                    del self._unsaved[:uploading]
+                    self._uploaded.notify_all()
+                print(f"DEBUG: Successfully uploaded AI_Initiatives.csv to Azure Blob")
+                return
+            
+            if upload_response is not None and upload_response.status_code in [409, 412]:
+                # Someone else wrote the blob since we loaded it - start from their version
+                print(f"DEBUG: AI_Initiatives.csv changed remotely, reloading before upload")
+                with self._lock:
+                    self._reload()
+                    for initiative_data in self._unsaved:
+                        self._apply_save(initiative_data)
+                continue
+            
+            if upload_response is not None:
+                print(f"DEBUG: Failed to upload to Azure Blob. Status: {upload_response.status_code}")
+                print(f"DEBUG: Response: {upload_response.text}")
+            if attempt < UPLOAD_RETRY_ATTEMPTS - 1:
+                time.sleep(2 ** attempt)
+        
+        print(f"ERROR: Giving up on AI_Initiatives.csv upload after {UPLOAD_RETRY_ATTEMPTS} attempts; "
+              f"unsaved changes are retried with the next save")
+    
+    def _rewrite_append_blob(self, csv_string: str, etag: Optional[str]):
+        """Recreate the append blob empty, then append the full snapshot."""
+        create_headers = {'x-ms-blob-type': 'AppendBlob', 'Content-Type': 'text/csv'}
+        create_headers["If-Match" if etag else "If-None-Match"] = etag or "*"
+        created = self._put(self.url, "", create_headers)
+        if created is None or created.status_code not in [200, 201]:
+            return created
+        
+        with self._lock:
+            # Blob is empty until the append lands; a retry starts from another full rewrite
+            self._etag = created.headers.get("ETag")
+            self._remote_rows = None
+        return self._put(self._append_block_url(), csv_string, {"If-Match": self._etag})
+    
+    def _append_block_url(self) -> str:
+        """Append Block URL for the blob (keeps the SAS query string)."""
+        return self.url + ("&" if "?" in self.url else "?") + "comp=appendblock"
+    
+    def _put(self, url: str, data: Union[str, bytes], headers: Dict[str, str]):
+        """PUT to blob storage; None if the request itself failed."""
+        try:
+            return _http_session.put(url, data=data, headers=headers, timeout=30)
+        except Exception as e:
+            print(f"DEBUG: Upload to Azure Blob failed: {e}")
+            return None
+
+_initiative_stores: Dict[str, InitiativesCSVStore] = {}
+_initiative_stores_lock = threading.Lock()
+
+def get_initiatives_store(url: str, columns: List[str]) -> InitiativesCSVStore:
+    """Get the process-wide store for an initiatives CSV URL, creating it on first use."""
+    with _initiative_stores_lock:
+        store = _initiative_stores.get(url)
+        if store is None:
+            store = _initiative_stores[url] = InitiativesCSVStore(url, columns)
+    return store
+
+def flush_initiative_uploads(timeout: float = 10.0):
+    """Wait (bounded) for pending initiative uploads, e.g. on shutdown."""
+    for store in list(_initiative_stores.values()):
+        store.flush(timeout)
+
+atexit.register(flush_initiative_uploads)
+
+
+def _build_openai_http_client() -> httpx.AsyncClient:
+    """Pooled async HTTP client shared by all OpenAI calls (HTTP/2 when h2 is installed)."""
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
     try:
-        log_conversation_event(session_id, event, data)
-    except Exception as e:
-        # Log to console but don't fail the main operation
-        print(f"WARNING: Logging failed for {event}: {e}")
-    finally:
-        # Check if logging took too long
-        log_duration = (datetime.now() - log_start).total_seconds() * 1000
-        if log_duration > max_time_ms:
-            print(f"WARNING: Logging {event} took {log_duration:.1f}ms (max: {max_time_ms}ms)")
+        return httpx.AsyncClient(http2=True, limits=limits, timeout=90)
+    except ImportError:
+        return httpx.AsyncClient(limits=limits, timeout=90)
 
 
-class SurveyAgent:
-    """Enhanced SurveyAgent with proper LangChain implementation and conversation management."""
+class SurveyAgentConfig:
+    """Read-only agent configuration shared by all sessions: LLM client, CSV data and prompts."""
     
     def __init__(self):
+        # One connection pool for every OpenAI call; all of them run on the shared agent loop
+        self.http_async_client = _build_openai_http_client()
+        
         # Initialize LLM with better settings
         self.llm = ChatOpenAI(
             temperature=0.3,  # Increased for faster inference
             model="gpt-4o-mini",  # Use GPT-4 mini for higher rate limits
             max_tokens=150,  # Reduced from 1000 - bot responses are typically 20-80 tokens
-            timeout=90  # Match LLMService.cs timeout
+            timeout=90,  # Match LLMService.cs timeout
+            http_async_client=self.http_async_client
         )
+        # Deterministic, slightly longer output for rolling conversation summaries
+        self.summary_llm = self.llm.bind(temperature=0, max_tokens=200)
+        # Tighter per-task output budgets (one question, one short reply, a short name or NONE)
+        self.question_llm = self.llm.bind(max_tokens=80)
+        self.follow_up_llm = self.llm.bind(max_tokens=80)
+        self.detection_llm = self.llm.bind(max_tokens=20)
         
         # Load configuration and data
         self._load_configuration()
         self._load_context_data()
         self._load_slots_data()
         self._setup_prompts()
-        
-        # Initialize data structures
-        self.collected_data = {field: None for field in self.slots}
+        self._previous_lock = threading.Lock()
         self.previous_initiatives = self._load_previous_initiatives()
-        self.conversation_history = []
-        self.max_conversation_length = 50  # Prevent memory explosion
-        self.in_follow_up_mode = False  # Track if we're in follow-up conversation mode
-        self.additional_initiatives = []  # Track additional initiatives mentioned in follow-up
-        self.collecting_additional = False  # Track if we're collecting data for additional initiative
-        self.current_additional_data = {}  # Data for current additional initiative being collected
-        self.awaiting_exit_confirmation = False  # Track if we're waiting for exit confirmation
+        self._previous_checked_at = time.monotonic()
+        self._previous_refreshing = False
+        self._index_previous_initiatives()
+        self._compile_deterministic_extractors()
         
     def _load_configuration(self):
         """Load Azure storage configuration."""
@@ -76,18 +719,13 @@ class SurveyAgent:
     def _load_context_data(self):
         """Load initial context from CSV."""
         try:
-            context_url = self._build_url("Test_Context_HPE.csv")
-            print(f"Loading context from: {context_url}")
+            print(f"Loading context from: {self._build_url('Test_Context_HPE.csv')}")
             
-            response = requests.get(context_url, timeout=30)
-            response.raise_for_status()
-            
-            context_csv = StringIO(response.text)
-            reader = csv.DictReader(context_csv)
-            context_row = next(reader)
+            rows = self._load_table_rows("Test_Context_HPE.csv")
+            context_row = rows[0]
             
             self.initial_context = self._format_context(context_row)
-            print(f"Successfully loaded context: {len(response.text)} chars")
+            print(f"Successfully loaded context: {len(self.initial_context)} chars")
             
         except Exception as e:
             print(f"Error loading context: {e}")
@@ -96,28 +734,30 @@ class SurveyAgent:
     def _load_slots_data(self):
         """Load slots and definitions from CSV."""
         try:
-            slots_url = self._build_url("Test_Slots.csv")
-            print(f"Loading slots from: {slots_url}")
-            
-            response = requests.get(slots_url, timeout=30)
-            response.raise_for_status()
+            print(f"Loading slots from: {self._build_url('Test_Slots.csv')}")
             
-            slots_csv = StringIO(response.text)
-            reader = csv.DictReader(slots_csv)
+            rows = self._load_table_rows("Test_Slots.csv")
             
             self.slots = []
             self.definitions = {}
+            self.question_templates = {}
             
-            for row in reader:
-                field = row["field_name"]
+            for row in rows:
+                # Interned so every session's collected_data keys and the config tables built from
+                # self.slots share one string object per field (literals like "Type of AI" aren't
+                # auto-interned; lookups with them still match by equality)
+                field = sys.intern(row["field_name"])
                 definition = row["definition"]
                 self.slots.append(field)
                 self.definitions[field] = definition
+                # Optional column: fixed question wording with {context}/{prev} placeholders
+                self.question_templates[field] = (row.get("question_template") or "").strip() or None
             
             print(f"Loaded {len(self.slots)} slots: {', '.join(self.slots)}")
             
         except Exception as e:
             print(f"Error loading slots: {e}")
+            self.question_templates = {}
             # Fallback slots with improved definitions
             self.slots = ["Initiative", "Type of AI", "Current Stage", "Budget", 
                          "Business Objectives", "Success Metrics", "Department", 
@@ -134,6 +774,18 @@ class SurveyAgent:
                 "Next Steps": "Planned future actions or milestones (e.g., 'complete pilot testing', 'deploy to production', 'expand to more users', 'build and deploy', 'start development')"
             }
     
+    def _load_table_rows(self, csv_filename: str) -> List[Dict[str, str]]:
+        """Load a read-only config table, preferring its Parquet copy when pyarrow is installed."""
+        if pq is not None:
+            parquet_url = self._build_url(csv_filename.rsplit(".", 1)[0] + ".parquet")
+            try:
+                return _fetch_parquet_rows(parquet_url)
+            except requests.HTTPError:
+                pass  # No Parquet copy published - use the CSV
+            except Exception as e:
+                print(f"Unreadable Parquet copy of {csv_filename}, using CSV: {e}")
+        return _fetch_csv(self._build_url(csv_filename), _parse_csv_rows)
+    
     def _build_url(self, filename: str) -> str:
         """Build Azure blob URL with optional SAS token."""
         if self.sas_token:
@@ -148,6 +800,42 @@ class SurveyAgent:
     def _setup_prompts(self):
         """Setup LangChain prompts with proper structure."""
         
+        # Field definitions are identical for every extraction call, build them once
+        self._field_defs_str = "\n".join(f"- {field}: {self.definitions[field]}" for field in self.slots)
+        self._slot_set = frozenset(self.slots)  # O(1) membership checks for extracted keys
+        self._empty_slot_data = dict.fromkeys(self.slots)  # Template copied for each new initiative record
+        
+        # Extraction uses function calling against a schema built from the slots
+        self.extraction_schema = {
+            "description": "Information the user explicitly stated; null for fields not mentioned",
+            "type": "object",
+            "properties": {
+                field: {"type": ["string", "null"], "description": self.definitions[field]}
+                for field in self.slots
+            },
+            "required": list(self.slots)
+        }
+        
+        # One call per turn returns both the extracted fields and the next question
+        self.turn_schema = {
+            "title": "survey_turn",
+            "description": "Fields extracted from the user's latest response and the next interview question",
+            "type": "object",
+            "properties": {
+                "extracted": self.extraction_schema,
+                "next_field": {"type": "string", "description": "The field the next question asks about"},
+                "next_question": {"type": "string", "description": "The next question to ask the user"}
+            },
+            "required": ["extracted", "next_field", "next_question"]
+        }
+        self.turn_llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=0.3,
+            max_tokens=300,
+            timeout=90,
+            http_async_client=self.http_async_client
+        ).with_structured_output(self.turn_schema)
+        
         # System message for conversation management
         system_message = """You are a professional AI consultant representing the AI Centre of Excellence. 
 Your role is to conduct a structured interview to gather comprehensive information about AI initiatives.
@@ -179,23 +867,253 @@ Your goal is to collect information for each field systematically while maintain
             field_order=", ".join(self.slots)
         )
         
-        # Extraction prompt for field extraction
-        self.extraction_prompt = ChatPromptTemplate.from_messages([
-            ("system", """Extract specific information from the user's response ONLY. 
+        # Turn prompt: extract from the latest user response and ask the next question together
+        self.turn_prompt = ChatPromptTemplate.from_messages([
+            ("system", system_message + """
+
+FIELD EXTRACTION:
+Before asking, extract specific information from the user's latest response ONLY.
+Do not extract information from the assistant's questions.
+
+Fields to extract: {field_definitions}
+
+Use null for fields not mentioned by the user. Only extract information explicitly stated by the user.
+Then ask about the first missing field (in collection order) that your extraction did not fill,
+and set next_field to that field's name."""),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{input}")
+        ]).partial(
+            field_order=", ".join(self.slots),
+            field_definitions=self._field_defs_str
+        )
+        
+        # Batch extraction prompt for replaying several user turns in one call
+        self.batch_extraction_prompt = ChatPromptTemplate.from_messages([
+            ("system", """Extract specific information from each of the user's responses ONLY.
 Do not extract information from the assistant's questions.
 
 Fields to extract: {field_definitions}
 
-Return a JSON object with field names as keys. Use null for fields not mentioned by the user.
+You will receive a JSON object of the form {{"turns": [{{"id": 0, "text": "..."}}, ...]}}.
+Return a JSON array with one entry per turn, using field names as keys and null for fields not mentioned in that turn.
 Only extract information explicitly stated by the user.
 
 Example format:
-{{"Initiative": "chatbot project", "Type of AI": "natural language processing", "Department": null}}"""),
-            ("human", "User response: {user_response}\n\nExtract information as JSON:")
+[{{"id": 0, "fields": {{"Initiative": "chatbot project", "Department": null}}}}, {{"id": 1, "fields": {{"Initiative": null, "Department": "IT"}}}}]"""),
+            ("human", "User turns: {turns}\n\nExtract information as a JSON array:")
+        ])
+        
+        # Follow-up conversation prompt, used once all fields are collected
+        self.follow_up_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a professional AI consultant having a follow-up conversation after collecting 
+all required information about an AI initiative. Be conversational, encouraging, and show interest in their work.
+
+You can:
+- Ask follow-up questions about their AI projects
+- Provide encouragement or insights
+- Discuss challenges or opportunities
+- Ask about other AI initiatives they might have
+
+Keep responses concise (1-2 sentences) and engaging. End with a question to keep the conversation going, 
+unless they seem to be wrapping up the discussion."""),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "User said: {input}")
+        ])
+        
+        # New-initiative detection prompt for follow-up turns
+        self.detection_prompt = ChatPromptTemplate.from_messages([
+            ("system", """Analyze the user's message to detect if they mention any NEW AI initiatives or projects 
+that are different from what was already discussed.
+
+Look for phrases like:
+- "we're also working on..."
+- "another project is..."
+- "we have a [project type] project"
+- "planning to build..."
+- "developing a..."
+
+Only extract clear, distinct AI initiatives. Don't extract general AI concepts or technologies.
+
+If you find a new initiative, respond with just the initiative name/description (e.g. "voice assistant", "document analysis system", "fraud detection AI").
+If no new initiative is mentioned, respond with "NONE".
+
+Examples:
+User: "We're also planning a voice assistant project" → "voice assistant project"
+User: "Another initiative is document analysis" → "document analysis initiative" 
+User: "That uses machine learning" → "NONE"
+User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
+            ("human", "User said: {user_input}")
         ])
+        
+        # Pre-rendered system messages: per-turn calls just append history and the new human
+        # message instead of re-templating the constant parts through format_messages
+        self.chat_system_message = self.chat_prompt.format_messages(history=[], input="")[0]
+        self.turn_system_message = self.turn_prompt.format_messages(history=[], input="")[0]
+        self.follow_up_system_message = self.follow_up_prompt.format_messages(history=[], input="")[0]
+        self.detection_system_message = self.detection_prompt.format_messages(user_input="")[0]
+    
+    def _index_previous_initiatives(self):
+        """Transpose previous initiatives into column lists (field -> values in row order)."""
+        columns = dict.fromkeys(col for row in self.previous_initiatives for col in row)
+        self.previous_by_field = {
+            col: [row.get(col) for row in self.previous_initiatives] for col in columns
+        }
+    
+    def _compile_deterministic_extractors(self):
+        """Combine the cheap-field patterns for the loaded slots into one regex."""
+        self.deterministic_pattern, self.deterministic_groups = compile_deterministic_extractors(self.slots)
+    
+    def refresh_previous_initiatives(self) -> List[Dict[str, Any]]:
+        """Return previous initiatives, revalidating them in the background at most every PREVIOUS_INITIATIVES_TTL_S.
+        
+        The conditional GET runs on the shared agent loop; callers get the current copy
+        without waiting for it.
+        """
+        with self._previous_lock:
+            if (not self._previous_refreshing
+                    and time.monotonic() - self._previous_checked_at >= PREVIOUS_INITIATIVES_TTL_S):
+                self._previous_refreshing = True
+                asyncio.run_coroutine_threadsafe(self._arefresh_previous_initiatives(), _get_agent_loop())
+            return self.previous_initiatives
+    
+    async def _arefresh_previous_initiatives(self):
+        """Revalidate AI_Initiatives.csv and swap in the new rows if it changed."""
+        try:
+            initiatives = await _afetch_csv(self._build_url("AI_Initiatives.csv"), _parse_csv_rows)
+        except httpx.HTTPStatusError:
+            initiatives = []
+        except Exception as e:
+            print(f"Error refreshing previous initiatives: {e}")
+            initiatives = self.previous_initiatives  # Keep serving the last good copy
+        
+        with self._previous_lock:
+            self._previous_checked_at = time.monotonic()
+            self._previous_refreshing = False
+            if initiatives is not self.previous_initiatives:  # Same object on 304 Not Modified
+                self.previous_initiatives = initiatives
+                self._index_previous_initiatives()
+                print(f"Loaded {len(initiatives)} previous initiatives")
+    
+    def _load_previous_initiatives(self) -> List[Dict[str, Any]]:
+        """Load previous initiatives from storage."""
+        try:
+            initiatives_url = self._build_url("AI_Initiatives.csv")
+            initiatives = _fetch_csv(initiatives_url, _parse_csv_rows)
+            print(f"Loaded {len(initiatives)} previous initiatives")
+            return initiatives
+                
+        except requests.HTTPError:
+            print("No previous initiatives found")
+            return []
+        except Exception as e:
+            print(f"Error loading previous initiatives: {e}")
+            return []
+
+
+_shared_config: Optional[SurveyAgentConfig] = None
+_shared_config_lock = threading.Lock()
+
+def get_shared_config() -> SurveyAgentConfig:
+    """Get the process-wide SurveyAgentConfig, building it on first use."""
+    global _shared_config
+    with _shared_config_lock:
+        if _shared_config is None:
+            _shared_config = SurveyAgentConfig()
+    return _shared_config
+
+def refresh_shared_config():
+    """Drop cached blob downloads and the shared config; the next session reloads from storage."""
+    global _shared_config
+    with _shared_config_lock:
+        _BLOB_CACHE.clear()
+        _shared_config = None  # Running sessions keep the config they were built with
+
+
+class SurveyAgent:
+    """Enhanced SurveyAgent with proper LangChain implementation and conversation management.
+    
+    Holds only per-session conversation state; everything expensive to build lives in the
+    shared SurveyAgentConfig.
+    """
+    
+    # Phrase matchers, compiled once at class load (same substring semantics as a phrase list)
+    _CLEAR_EXIT_RE = _compile_phrases(["bye", "goodbye", "see you", "thanks bye", "thank you bye"])
+    _AMBIGUOUS_EXIT_RE = _compile_phrases(["done", "finished", "that's all", "stop here", "end the", "we're done"])
+    _EXIT_CONFIRM_RE = _compile_phrases(["yes", "yeah", "yep", "finished", "done", "exit", "quit"])
+    _CONTINUE_RE = _compile_phrases(["no", "continue", "keep going", "more", "not yet"])
+    _DECLINE_RE = _compile_phrases(["no", "not now", "skip", "maybe later", "not interested", "no thanks"], whole_words=True)
+    _AGREE_RE = _compile_phrases(["yes", "sure", "ok", "okay", "sounds good", "let's do it", "go ahead"], whole_words=True)
+    
+    # Cheap prefilter for new-initiative mentions; only messages that match reach the detection LLM
+    _NEW_INITIATIVE_TRIGGER_RE = re.compile(
+        r"\b(?:also\s+(?:working|planning|building|developing|doing|looking)"
+        r"|another\s+(?:ai\s+)?(?:project|initiative|use case|pilot)"
+        r"|we(?:['\u2019]re|\s+are)\s+(?:also\s+)?(?:building|developing|planning|working on|exploring)"
+        r"|we\s+(?:also\s+)?have\s+an?\s+.*?\b(?:project|initiative)"
+        r"|planning\s+to\s+(?:build|develop|launch|roll out)"
+        r"|developing\s+an?)\b",
+        re.IGNORECASE
+    )
+    
+    def __init__(self, config: Optional[SurveyAgentConfig] = None):
+        # Reuse the shared configuration (LLM client, CSV data, prompts)
+        self.config = config or get_shared_config()
+        self.llm = self.config.llm
+        self.initial_context = self.config.initial_context
+        self.slots = self.config.slots
+        self.definitions = self.config.definitions
+        self.previous_initiatives = self.config.refresh_previous_initiatives()
+        self.chat_prompt = self.config.chat_prompt
+        self.turn_prompt = self.config.turn_prompt
+        self.batch_extraction_prompt = self.config.batch_extraction_prompt
+        self.follow_up_prompt = self.config.follow_up_prompt
+        self.detection_prompt = self.config.detection_prompt
+        self.chat_system_message = self.config.chat_system_message
+        self.turn_system_message = self.config.turn_system_message
+        self.follow_up_system_message = self.config.follow_up_system_message
+        self.detection_system_message = self.config.detection_system_message
+        self.summary_llm = self.config.summary_llm
+        self.question_llm = self.config.question_llm
+        self.follow_up_llm = self.config.follow_up_llm
+        self.detection_llm = self.config.detection_llm
+        self.turn_llm = self.config.turn_llm
+        self._field_defs_str = self.config._field_defs_str
+        self._slot_set = self.config._slot_set
+        self._empty_slot_data = self.config._empty_slot_data
+        self.question_templates = self.config.question_templates
+        
+        # Initialize data structures
+        self.collected_data = self._empty_slot_data.copy()
+        self.max_conversation_length = 50  # Prevent memory explosion
+        self._history_head_size = 5  # Opening messages always kept as conversation anchor
+        self._history_head: List = []
+        self.conversation_history = deque(maxlen=self.max_conversation_length - self._history_head_size)
+        self._history_summary = ""  # Rolling summary that replaces old history in prompts
+        self._unsummarized: List = []  # Messages added since the last summary
+        self._summarizing: List = []  # Messages the running summary task is folding in
+        self._summary_task: Optional[asyncio.Task] = None
+        self.in_follow_up_mode = False  # Track if we're in follow-up conversation mode
+        self.additional_initiatives = []  # Track additional initiatives mentioned in follow-up
+        self.collecting_additional = False  # Track if we're collecting data for additional initiative
+        self.current_additional_data = {}  # Data for current additional initiative being collected
+        self.awaiting_exit_confirmation = False  # Track if we're waiting for exit confirmation
+        self._extraction_queue: List[str] = []  # User turns waiting for a batched extraction
+        
+    @staticmethod
+    def refresh_blob_cache():
+        """Reload context, slots and previous initiatives for sessions created after this call."""
+        refresh_shared_config()
     
     def get_initial_greeting(self) -> str:
-        """Generate personalized initial greeting."""
+        """Generate personalized initial greeting (blocking wrapper)."""
+        return run_agent_coroutine(self.aget_initial_greeting())
+    
+    async def aget_initial_greeting(self, on_first_tokens: Optional[Callable[[str], None]] = None) -> str:
+        """Generate personalized initial greeting.
+        
+        If on_first_tokens is given the greeting is streamed and the callback receives the
+        first RESPONSE_PREVIEW_TOKENS tokens as soon as they arrive (e.g. to start TTS early).
+        """
         try:
             # Context for greeting
             context_info = self._build_greeting_context()
@@ -209,13 +1127,35 @@ Keep it concise and engaging - just 2-3 sentences."""),
                 ("human", f"Customer context: {context_info}\n\nGenerate greeting:")
             ])
             
-            response = self.llm.invoke(greeting_prompt.format_messages())
-            return response.content.strip()
+            return await self._acomplete_text(self.llm, greeting_prompt.format_messages(), on_first_tokens)
             
         except Exception as e:
             print(f"Error generating greeting: {e}")
             return "Hello! I'd love to learn about the AI initiatives you're currently working on. Could you tell me about a specific AI project you're involved with?"
     
+    async def _acomplete_text(self, runnable, messages: List,
+                              on_first_tokens: Optional[Callable[[str], None]] = None) -> str:
+        """Run a text LLM call; stream it when the caller wants the first tokens early."""
+        if on_first_tokens is None:
+            response = await ainvoke_llm(runnable, messages)
+            return response.content.strip()
+        
+        chunks = []
+        async for chunk in runnable.astream(messages):
+            chunks.append(chunk.content)
+            if len(chunks) == RESPONSE_PREVIEW_TOKENS:
+                self._emit_preview(on_first_tokens, "".join(chunks))
+        if len(chunks) < RESPONSE_PREVIEW_TOKENS:
+            self._emit_preview(on_first_tokens, "".join(chunks))
+        return "".join(chunks).strip()
+    
+    def _emit_preview(self, on_first_tokens: Callable[[str], None], text: str):
+        """Hand the partial reply to the caller without letting its errors abort the stream."""
+        try:
+            on_first_tokens(text.lstrip())
+        except Exception as e:
+            print(f"WARNING: Reply preview callback failed: {e}")
+    
     def _build_greeting_context(self) -> str:
         """Build context for greeting generation."""
         context_parts = [self.initial_context]
@@ -231,18 +1171,30 @@ Keep it concise and engaging - just 2-3 sentences."""),
         if not self.previous_initiatives:
             return "None"
         
-        # Get key info from previous initiatives
-        initiatives = []
-        for init in self.previous_initiatives[:3]:  # Limit to recent 3
-            name = init.get("Initiative", "Unknown")
-            ai_type = init.get("Type of AI", "")
-            stage = init.get("Current Stage", "")
-            initiatives.append(f"{name} ({ai_type}, {stage})".strip(" ,()"))
+        # Get key info from previous initiatives, one column scan per field
+        count = min(len(self.previous_initiatives), 3)  # Limit to recent 3
+        by_field = self.config.previous_by_field
+        names = by_field.get("Initiative", ["Unknown"] * count)[:count]
+        ai_types = by_field.get("Type of AI", [""] * count)[:count]
+        stages = by_field.get("Current Stage", [""] * count)[:count]
+        initiatives = [f"{name} ({ai_type}, {stage})".strip(" ,()")
+                       for name, ai_type, stage in zip(names, ai_types, stages)]
         
         return "; ".join(initiatives)
     
-    def process_user_input(self, user_input: str) -> Dict[str, Any]:
-        """Process user input and return response with extracted data."""
+    def process_user_input(self, user_input: str,
+                           on_first_tokens: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Process user input and return response with extracted data (blocking wrapper)."""
+        return run_agent_coroutine(self.aprocess_user_input(user_input, on_first_tokens))
+    
+    async def aprocess_user_input(self, user_input: str,
+                                  on_first_tokens: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Process user input and return response with extracted data.
+        
+        If on_first_tokens is given, replies generated by the LLM are streamed and the callback
+        receives their first RESPONSE_PREVIEW_TOKENS tokens early. Template, drafted and fixed
+        replies are only returned in "message".
+        """
         try:
             # Handle exit confirmation if we're waiting for one
             if self.awaiting_exit_confirmation:
@@ -264,28 +1216,18 @@ Keep it concise and engaging - just 2-3 sentences."""),
             
             # If we're in follow-up mode, handle general conversation
             if self.in_follow_up_mode:
-                return self._handle_follow_up_conversation(user_input)
-            
-            # Extract information from user input (only when collecting initial data)
-            self._extract_fields_from_input(user_input)
+                return await self._ahandle_follow_up_conversation(user_input, on_first_tokens)
             
-            # Check if all fields are collected
-            missing_fields = self.get_missing_fields()
-            if not missing_fields:
-                # Transition to follow-up mode instead of completing
+            missing_fields, next_question = await self._acollect_turn(user_input, self.collected_data, on_first_tokens)
+            if next_question is None:
+                # All fields collected - transition to follow-up mode instead of completing
                 self.in_follow_up_mode = True
                 return self._create_completion_response()
             
-            # Generate next question
-            next_question = self._generate_next_question(user_input, missing_fields)
-            
-            # Add assistant response to history
-            self._add_to_history(AIMessage(content=next_question))
-            
             return {
                 "message": next_question,
                 "status": "collecting",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": missing_fields
             }
             
@@ -294,99 +1236,192 @@ Keep it concise and engaging - just 2-3 sentences."""),
             return {
                 "message": "I apologize, could you please repeat that?",
                 "status": "collecting" if not self.in_follow_up_mode else "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": self.get_missing_fields()
             }
     
+    async def _acollect_turn(self, user_input: str, collected: Dict[str, Any],
+                             on_first_tokens: Optional[Callable[[str], None]] = None) -> Tuple[List[str], Optional[str]]:
+        """Fill fields of `collected` from the reply and ask the next question; returns (missing_fields, question).
+        
+        question is None (and nothing is added to history) once every field is collected.
+        """
+        expected_missing = self._missing_fields(collected)
+        drafted = None
+        if self._is_trivial_input(user_input):
+            # Filler replies ("ok", "thanks") can't fill a field - go straight to the next question
+            safe_log_event(getattr(self, 'session_id', 'unknown'), "extraction_skipped_trivial", {
+                "field": expected_missing[0] if expected_missing else None
+            })
+        elif expected_missing:
+            # Cheap regex pass first; the LLM handles the remaining fields unless the reply
+            # held nothing beyond the regex matches
+            filled = self._extract_deterministic_fields(user_input, collected)
+            remaining = self._missing_fields(collected, expected_missing) if filled else expected_missing
+            if remaining and not (filled and self._is_deterministic_only(user_input)):
+                # Extract information and draft the next question in a single LLM call
+                drafted = await self._aextract_fields_and_question(user_input, remaining, collected)
+        
+        # Check if all fields are collected (fields only ever get filled, so just recheck the missing ones)
+        missing_fields = self._missing_fields(collected, expected_missing)
+        if not missing_fields:
+            return missing_fields, None
+        
+        # Prefer the slot template, then the drafted question if it targets the right field
+        next_field = missing_fields[0]
+        next_question = self._template_question(next_field, user_input, collected)
+        if not next_question and drafted and drafted[0] == next_field:
+            next_question = drafted[1]
+        if not next_question:
+            next_question = await self._agenerate_next_question(user_input, missing_fields, collected, on_first_tokens)
+        
+        # Add assistant response to history
+        self._add_to_history(AIMessage(content=next_question))
+        return missing_fields, next_question
+    
+    def _is_trivial_input(self, user_input: str) -> bool:
+        """Check if the reply is pure filler with no field content."""
+        text = user_input.strip().lower().strip(".!?,")
+        return len(text) <= 20 and text in TRIVIAL_INPUTS
+    
     def _is_clear_exit_command(self, user_input: str) -> bool:
         """Check if user clearly wants to exit (immediate exit)."""
-        clear_exit_phrases = ["bye", "goodbye", "see you", "thanks bye", "thank you bye"]
-        input_lower = user_input.lower().strip()
-        return any(phrase in input_lower for phrase in clear_exit_phrases)
+        return self._CLEAR_EXIT_RE.search(user_input) is not None
     
     def _contains_ambiguous_exit_phrase(self, user_input: str) -> bool:
         """Check if user input contains ambiguous exit phrases that need confirmation."""
-        ambiguous_phrases = ["done", "finished", "that's all", "stop here", "end the", "we're done"]
-        input_lower = user_input.lower().strip()
-        return any(phrase in input_lower for phrase in ambiguous_phrases)
+        return self._AMBIGUOUS_EXIT_RE.search(user_input) is not None
     
     def _is_exit_command(self, user_input: str) -> bool:
         """Legacy method - now only handles clear exits for backward compatibility."""
         return self._is_clear_exit_command(user_input)
     
-    def _extract_fields_from_input(self, user_input: str):
-        """Extract field information from user input using LLM."""
+    async def _aextract_fields_and_question(self, user_input: str, missing_fields: List[str],
+                                            collected: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Extract fields from user input into `collected` and draft the next question; return (next_field, question)."""
         try:
-            # Prepare field definitions
-            field_defs = "\n".join([f"- {field}: {self.definitions[field]}" 
-                                   for field in self.slots])
-            
-            # Generate extraction prompt
-            extraction_messages = self.extraction_prompt.format_messages(
-                field_definitions=field_defs,
-                user_response=user_input
-            )
-            
-            # Get extraction response with timing
+            # Build turn prompt around the currently-next missing field
+            context = self._build_question_context(missing_fields[0], collected)
+            messages = [
+                self.turn_system_message,
+                *self._get_limited_history(),
+                HumanMessage(content=f"Context: {context}\n\nMissing fields in order: {', '.join(missing_fields)}\n\nUser just said: {user_input}")
+            ]
+            
+            # Structured output returns a schema-validated dict - no JSON scraping or decode errors
             if ENABLE_LATENCY_LOGGING:
-                llm_start = datetime.now()
-                response = self.llm.invoke(extraction_messages)
-                llm_end = datetime.now()
-                llm_latency_ms = (llm_end - llm_start).total_seconds() * 1000
-                
-                content = response.content.strip()
+                llm_start = time.perf_counter_ns()
+                result = await ainvoke_llm(self.turn_llm, messages)
+                llm_latency_ms = (time.perf_counter_ns() - llm_start) / 1e6
                 
-                # Log LLM latency for extraction
-                safe_log_event(getattr(self, 'session_id', 'unknown'), "llm_extraction_latency", {
+                # Log LLM latency for the combined extraction + question call
+                safe_log_event(getattr(self, 'session_id', 'unknown'), "llm_turn_latency", {
                     "latency_ms": round(llm_latency_ms, 2),
-                    "response_length": len(content)
+                    "fields_returned": len((result or {}).get("extracted") or {})
                 })
             else:
-                response = self.llm.invoke(extraction_messages)
-                content = response.content.strip()
+                result = await ainvoke_llm(self.turn_llm, messages)
             
-            # Parse JSON response
-            try:
-                # Extract JSON from response
-                start = content.find("{")
-                end = content.rfind("}") + 1
-                if start >= 0 and end > start:
-                    json_str = content[start:end]
-                    extracted = json.loads(json_str)
-                    
-                    # Update collected data
-                    for field, value in extracted.items():
-                        if value and field in self.slots and not self.collected_data.get(field):
-                            cleaned_value = self._clean_field_value(field, value)
-                            if cleaned_value:
-                                self.collected_data[field] = cleaned_value
-                                print(f"Extracted {field}: {cleaned_value}")
-                else:
-                    # Log when no JSON found in LLM response
-                    if ENABLE_EXTRACTION_FAILURE_LOGGING:
-                        safe_log_event(getattr(self, 'session_id', 'unknown'), "extraction_failure", {
-                            "reason": "no_json_in_response",
-                            "llm_response": content[:200]
-                        })
-                
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {e}")
-                # Log extraction failure for audit
+            if not result:
                 if ENABLE_EXTRACTION_FAILURE_LOGGING:
-                    safe_log_event(getattr(self, 'session_id', 'unknown'), "extraction_failure", {
-                        "reason": "json_parse_error", 
-                        "llm_response": content[:200],
-                        "error": str(e)
+                    # Log when the model returned no structured result
+                    log_extraction_failure(getattr(self, 'session_id', 'unknown'), {
+                        "reason": "empty_structured_output"
                     })
+                return None
+            
+            # Update collected data
+            if result.get("extracted"):
+                self._apply_extracted_fields(result["extracted"], collected)
+            
+            question = (result.get("next_question") or "").strip()
+            return (result.get("next_field"), question) if question else None
                 
         except Exception as e:
             print(f"Extraction error: {e}")
             # Log extraction failure for audit
             if ENABLE_EXTRACTION_FAILURE_LOGGING:
-                safe_log_event(getattr(self, 'session_id', 'unknown'), "extraction_failure", {
+                log_extraction_failure(getattr(self, 'session_id', 'unknown'), {
                     "reason": "llm_error",
                     "error": str(e)
                 })
+            return None
+    
+    def _apply_extracted_fields(self, extracted: Dict[str, Any], collected: Dict[str, Any]) -> List[str]:
+        """Store extracted values for fields not in `collected` yet; return the fields filled."""
+        filled = []
+        for field, value in extracted.items():
+            if value and field in self._slot_set and not collected.get(field):
+                cleaned_value = self._clean_field_value(field, value)
+                if cleaned_value:
+                    collected[field] = cleaned_value
+                    filled.append(field)
+                    print(f"Extracted {field}: {cleaned_value}")
+        return filled
+    
+    def _extract_deterministic_fields(self, user_input: str, collected: Dict[str, Any]) -> List[str]:
+        """Fill budget/department/stage from a single precompiled regex scan."""
+        pattern = self.config.deterministic_pattern
+        if pattern is None:
+            return []
+        
+        extracted = match_deterministic_fields(pattern, self.config.deterministic_groups, user_input)
+        return self._apply_extracted_fields(extracted, collected) if extracted else []
+    
+    def _is_deterministic_only(self, user_input: str) -> bool:
+        """Check if the reply is nothing but regex-extractable values plus filler."""
+        leftover = self.config.deterministic_pattern.sub(" ", user_input)
+        words = re.sub(r"[\W_]+", " ", leftover).strip().lower()
+        return not words or words in TRIVIAL_INPUTS
+    
+    def queue_user_input(self, user_input: str):
+        """Queue a user turn for batched extraction (offline replay/testing)."""
+        self._extraction_queue.append(user_input)
+        self._add_to_history(HumanMessage(content=user_input))
+    
+    def flush(self) -> Dict[str, Any]:
+        """Extract all queued user turns with a single LLM call (blocking wrapper)."""
+        run_agent_coroutine(self._aflush_extractions())
+        return self.collected_data.copy()
+    
+    async def _aflush_extractions(self):
+        """Extract field information for all queued turns using one LLM call."""
+        if not self._extraction_queue:
+            return
+        
+        turns, self._extraction_queue = self._extraction_queue, []
+        try:
+            extraction_messages = self.batch_extraction_prompt.format_messages(
+                field_definitions=self._field_defs_str,
+                turns=_json_dumps({"turns": [{"id": i, "text": text} for i, text in enumerate(turns)]})
+            )
+            response = await self.llm.ainvoke(extraction_messages)
+            content = response.content.strip()
+            
+            start = content.find("[")
+            end = content.rfind("]") + 1
+            if start < 0 or end <= start:
+                if ENABLE_EXTRACTION_FAILURE_LOGGING:
+                    log_extraction_failure(getattr(self, 'session_id', 'unknown'), {
+                        "reason": "no_json_in_batch_response",
+                        "turns": len(turns),
+                        "llm_response": content[:200]
+                    })
+                return
+            
+            # Apply turns in conversation order so earlier answers win, as in live mode
+            results = _json_loads(content[start:end])
+            for item in sorted(results, key=lambda r: r.get("id", 0)):
+                self._apply_extracted_fields(item.get("fields") or {}, self.collected_data)
+                
+        except Exception as e:
+            print(f"Batch extraction error: {e}")
+            if ENABLE_EXTRACTION_FAILURE_LOGGING:
+                log_extraction_failure(getattr(self, 'session_id', 'unknown'), {
+                    "reason": "batch_llm_error",
+                    "turns": len(turns),
+                    "error": str(e)
+                })
     
     def _clean_field_value(self, field: str, value: Any) -> Any:
         """Clean and validate field values."""
@@ -409,30 +1444,10 @@ Keep it concise and engaging - just 2-3 sentences."""),
     
     def _clean_budget(self, value: str) -> str:
         """Clean and standardize budget format."""
-        if not value:
-            return None
-        
-        # Extract numbers and units
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(k|m|b|thousand|million|billion)?', 
-                         value.lower())
-        if match:
-            number, unit = match.groups()
-            number = float(number)
-            
-            # Standardize to millions
-            if unit and unit.startswith('k'):
-                return f"${number/1000:.1f}M"
-            elif unit and unit.startswith('b'):
-                return f"${number*1000:.0f}M"
-            elif unit and unit.startswith('m'):
-                return f"${number:.1f}M"
-            else:
-                # Assume it's in thousands if no unit
-                return f"${number/1000:.1f}M"
-        
-        return value
+        return clean_budget_value(value)
     
-    def _generate_next_question(self, user_input: str, missing_fields: List[str]) -> str:
+    async def _agenerate_next_question(self, user_input: str, missing_fields: List[str], collected: Dict[str, Any],
+                                       on_first_tokens: Optional[Callable[[str], None]] = None) -> str:
         """Generate next question based on conversation context."""
         try:
             # Get next field to focus on
@@ -440,24 +1455,29 @@ Keep it concise and engaging - just 2-3 sentences."""),
             if not next_field:
                 return "Thank you! I believe I have all the information I need."
             
+            # Use the slot's question template when there is one - no LLM call needed
+            question = self._template_question(next_field, user_input, collected)
+            if question:
+                return question
+            
             # Build context for question generation
-            context = self._build_question_context(next_field)
+            context = self._build_question_context(next_field, collected)
             
             # Create conversation history for prompt (limited length)
             limited_history = self._get_limited_history()
             
             # Generate question using chat prompt
-            messages = self.chat_prompt.format_messages(
-                history=limited_history,
-                input=f"Context: {context}\n\nNext field needed: {next_field} - {self.definitions[next_field]}\n\nUser just said: {user_input}"
-            )
+            messages = [
+                self.chat_system_message,
+                *limited_history,
+                HumanMessage(content=f"Context: {context}\n\nNext field needed: {next_field} - {self.definitions[next_field]}\n\nUser just said: {user_input}")
+            ]
             
             # Generate question with timing
             if ENABLE_LATENCY_LOGGING:
-                llm_start = datetime.now()
-                response = self.llm.invoke(messages)
-                llm_end = datetime.now()
-                llm_latency_ms = (llm_end - llm_start).total_seconds() * 1000
+                llm_start = time.perf_counter_ns()
+                question = await self._acomplete_text(self.question_llm, messages, on_first_tokens)
+                llm_latency_ms = (time.perf_counter_ns() - llm_start) / 1e6
                 
                 # Log LLM latency for question generation
                 safe_log_event(getattr(self, 'session_id', 'unknown'), "llm_question_latency", {
@@ -465,9 +1485,9 @@ Keep it concise and engaging - just 2-3 sentences."""),
                     "field": next_field
                 })
             else:
-                response = self.llm.invoke(messages)
+                question = await self._acomplete_text(self.question_llm, messages, on_first_tokens)
             
-            return response.content.strip()
+            return question
             
         except Exception as e:
             print(f"Error generating question: {e}")
@@ -475,7 +1495,34 @@ Keep it concise and engaging - just 2-3 sentences."""),
             field_def = self.definitions.get(next_field, "this information")
             return f"Could you tell me more about {field_def.lower()}?"
     
-    def _build_question_context(self, next_field: str) -> str:
+    def _template_question(self, next_field: str, user_input: str, collected: Dict[str, Any]) -> Optional[str]:
+        """Render the slot's question template unless the user asked for a rewording."""
+        template = self.question_templates.get(next_field)
+        if template and not self._is_rephrase_request(user_input):
+            return self._render_question_template(template, next_field, collected)
+        return None
+    
+    def _render_question_template(self, template: str, next_field: str, collected: Dict[str, Any]) -> Optional[str]:
+        """Fill a slot question template; None if a placeholder has no data or is unknown."""
+        values = {}
+        if "{prev}" in template:
+            values["prev"] = self._get_relevant_previous_data(next_field)
+        if "{context}" in template:
+            values["context"] = self._build_question_context(next_field, collected)
+        
+        if not all(values.values()):
+            return None
+        try:
+            return template.format(**values)
+        except (KeyError, IndexError, ValueError):
+            print(f"Invalid question template for {next_field}: {template}")
+            return None
+    
+    def _is_rephrase_request(self, user_input: str) -> bool:
+        """Check if the user asked for the last question to be reworded."""
+        return _REPHRASE_REQUEST_RE.search(user_input) is not None
+    
+    def _build_question_context(self, next_field: str, collected: Dict[str, Any]) -> str:
         """Build context for question generation."""
         context_parts = []
         
@@ -483,9 +1530,9 @@ Keep it concise and engaging - just 2-3 sentences."""),
         context_parts.append(self.initial_context)
         
         # Add current progress
-        collected = [f"{k}: {v}" for k, v in self.collected_data.items() if v]
-        if collected:
-            context_parts.append("Information collected so far:\n" + "\n".join(collected))
+        progress = [f"{k}: {v}" for k, v in collected.items() if v]
+        if progress:
+            context_parts.append("Information collected so far:\n" + "\n".join(progress))
         
         # Add relevant previous initiatives
         if self.previous_initiatives:
@@ -497,32 +1544,64 @@ Keep it concise and engaging - just 2-3 sentences."""),
     
     def _get_relevant_previous_data(self, field: str) -> str:
         """Get relevant data from previous initiatives for the current field."""
-        values = []
-        for init in self.previous_initiatives[:5]:  # Check recent 5
-            if field in init and init[field]:
-                values.append(str(init[field]))
+        # Column slice of the recent 5 initiatives, no per-row dict lookups
+        recent = self.config.previous_by_field.get(field, [])[:5]
         
-        return "; ".join(set(values[:3]))  # Unique values, max 3
+        return "; ".join(list(dict.fromkeys(str(v) for v in recent if v))[:3])  # Unique values, max 3
     
     def _get_limited_history(self) -> List:
         """Get conversation history limited to prevent token overflow."""
-        # Keep only recent messages to manage context window
-        if len(self.conversation_history) <= self.max_conversation_length:
-            return self.conversation_history
-        
-        # Keep first few and last many messages
-        start_messages = self.conversation_history[:5]
-        recent_messages = self.conversation_history[-(self.max_conversation_length-5):]
+        # Once summarized, send the summary plus every message it doesn't cover yet
+        # (including the batch still being summarized)
+        if self._history_summary:
+            summary = SystemMessage(content=f"Summary of the conversation so far: {self._history_summary}")
+            return [summary, *self._summarizing, *self._unsummarized]
         
-        return start_messages + recent_messages
+        # First few messages plus the bounded recent window
+        return self._history_head + list(self.conversation_history)
     
     def _add_to_history(self, message):
         """Add message to conversation history."""
-        self.conversation_history.append(message)
+        if len(self._history_head) < self._history_head_size:
+            self._history_head.append(message)
+        else:
+            # deque(maxlen) drops the oldest recent message in O(1)
+            self.conversation_history.append(message)
+        
+        self._unsummarized.append(message)
+        if len(self._unsummarized) >= HISTORY_SUMMARY_INTERVAL and self._summary_task is None:
+            self._schedule_history_summary()
+    
+    def _schedule_history_summary(self):
+        """Fold unsummarized messages into the rolling summary in the background."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Not on the agent loop (e.g. offline replay) - summarize on a later turn
         
-        # Trim history if it gets too long
-        if len(self.conversation_history) > self.max_conversation_length + 10:
-            self.conversation_history = self.conversation_history[-self.max_conversation_length:]
+        messages, self._unsummarized = self._unsummarized, []
+        self._summarizing = messages
+        self._summary_task = loop.create_task(self._aupdate_history_summary(messages))
+    
+    async def _aupdate_history_summary(self, messages: List):
+        """Update the rolling conversation summary with a batch of messages."""
+        try:
+            transcript = "\n".join(f"{message.type}: {message.content}" for message in messages)
+            response = await self.summary_llm.ainvoke([
+                SystemMessage(content="""Summarize this AI initiative interview for the interviewer's memory.
+Keep every concrete fact the user gave (names, numbers, technologies, plans) and what was already asked.
+Be concise: at most 5 sentences."""),
+                HumanMessage(content=f"Previous summary: {self._history_summary or 'None'}\n\nNew messages:\n{transcript}")
+            ])
+            self._history_summary = response.content.strip()
+            
+        except Exception as e:
+            # Keep the messages so the next attempt still covers them
+            print(f"Error summarizing conversation history: {e}")
+            self._unsummarized = messages + self._unsummarized
+        finally:
+            self._summarizing = []
+            self._summary_task = None
     
     def _create_completion_response(self) -> Dict[str, Any]:
         """Create response for completed conversation with follow-up question."""
@@ -530,7 +1609,7 @@ Keep it concise and engaging - just 2-3 sentences."""),
         return {
             "message": follow_up_message,
             "status": "follow_up",  # Changed from "completed" to allow continued conversation
-            "collected_data": self.collected_data.copy(),
+            "collected_data": MappingProxyType(self.collected_data),
             "missing_fields": []
         }
     
@@ -539,7 +1618,7 @@ Keep it concise and engaging - just 2-3 sentences."""),
         return {
             "message": "Thank you for sharing your insights about AI initiatives. Have a great day!",
             "status": "completed",
-            "collected_data": self.collected_data.copy(),
+            "collected_data": MappingProxyType(self.collected_data),
             "missing_fields": []
         }
     
@@ -549,27 +1628,23 @@ Keep it concise and engaging - just 2-3 sentences."""),
         return {
             "message": "Are you finished discussing your AI initiatives, or would you like to continue our conversation?",
             "status": "confirming_exit",
-            "collected_data": self.collected_data.copy(),
+            "collected_data": MappingProxyType(self.collected_data),
             "missing_fields": []
         }
     
     def _handle_exit_confirmation_response(self, user_input: str) -> Dict[str, Any]:
         """Handle user response to exit confirmation."""
         self.awaiting_exit_confirmation = False
-        input_lower = user_input.lower().strip()
         
         # Check if user confirms they want to exit
-        exit_confirmations = ["yes", "yeah", "yep", "finished", "done", "exit", "quit"]
-        continue_phrases = ["no", "continue", "keep going", "more", "not yet"]
-        
-        if any(phrase in input_lower for phrase in exit_confirmations):
+        if self._EXIT_CONFIRM_RE.search(user_input):
             return self._create_final_completion_response()
-        elif any(phrase in input_lower for phrase in continue_phrases):
+        elif self._CONTINUE_RE.search(user_input):
             # Return to follow-up mode
             return {
                 "message": "Great! What else would you like to discuss about your AI initiatives?",
                 "status": "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
         else:
@@ -578,24 +1653,30 @@ Keep it concise and engaging - just 2-3 sentences."""),
             return {
                 "message": "I'm not sure if you'd like to continue or finish. Could you please say 'continue' to keep discussing or 'finished' to end our conversation?",
                 "status": "confirming_exit",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
     
-    def _handle_follow_up_conversation(self, user_input: str) -> Dict[str, Any]:
+    async def _ahandle_follow_up_conversation(self, user_input: str,
+                                              on_first_tokens: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """Handle general conversation after all required fields are collected."""
         try:
             # If we're in the middle of collecting additional initiative data
             if self.collecting_additional:
-                return self._handle_additional_initiative_collection(user_input)
-            
-            # Check if user mentioned a new initiative
-            new_initiative = self._detect_new_initiative(user_input)
+                return await self._ahandle_additional_initiative_collection(user_input, on_first_tokens)
+            
+            # Check if user mentioned a new initiative while speculatively generating a conversational
+            # response - unless it streams to the caller, since a discarded reply must not reach TTS
+            response_task = None
+            if on_first_tokens is None:
+                response_task = asyncio.create_task(self._agenerate_follow_up_response(user_input))
+            new_initiative = await self._adetect_new_initiative(user_input)
             if new_initiative:
+                if response_task:
+                    response_task.cancel()
                 return self._offer_to_collect_additional_initiative(new_initiative, user_input)
             
-            # Generate a conversational response
-            follow_up_response = self._generate_follow_up_response(user_input)
+            follow_up_response = await (response_task or self._agenerate_follow_up_response(user_input, on_first_tokens))
             
             # Add assistant response to history
             self._add_to_history(AIMessage(content=follow_up_response))
@@ -603,7 +1684,7 @@ Keep it concise and engaging - just 2-3 sentences."""),
             return {
                 "message": follow_up_response,
                 "status": "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
             
@@ -612,73 +1693,36 @@ Keep it concise and engaging - just 2-3 sentences."""),
             return {
                 "message": "That's interesting! Is there anything else you'd like to share about your AI initiatives?",
                 "status": "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
     
-    def _generate_follow_up_response(self, user_input: str) -> str:
+    async def _agenerate_follow_up_response(self, user_input: str,
+                                            on_first_tokens: Optional[Callable[[str], None]] = None) -> str:
         """Generate conversational response for follow-up discussions."""
         try:
-            # Create a prompt for follow-up conversation
-            follow_up_prompt = ChatPromptTemplate.from_messages([
-                ("system", """You are a professional AI consultant having a follow-up conversation after collecting 
-all required information about an AI initiative. Be conversational, encouraging, and show interest in their work.
-
-You can:
-- Ask follow-up questions about their AI projects
-- Provide encouragement or insights
-- Discuss challenges or opportunities
-- Ask about other AI initiatives they might have
-
-Keep responses concise (1-2 sentences) and engaging. End with a question to keep the conversation going, 
-unless they seem to be wrapping up the discussion."""),
-                MessagesPlaceholder(variable_name="history"),
-                ("human", "User said: {input}")
-            ])
-            
             # Generate response using limited history
             limited_history = self._get_limited_history()
-            messages = follow_up_prompt.format_messages(
-                history=limited_history,
-                input=user_input
-            )
+            messages = [self.follow_up_system_message, *limited_history, HumanMessage(content=f"User said: {user_input}")]
             
-            response = self.llm.invoke(messages)
-            return response.content.strip()
+            return await self._acomplete_text(self.follow_up_llm, messages, on_first_tokens)
             
         except Exception as e:
             print(f"Error generating follow-up response: {e}")
             return "That's very interesting! What other AI projects are you excited about working on?"
     
-    def _detect_new_initiative(self, user_input: str) -> str:
+    async def _adetect_new_initiative(self, user_input: str) -> str:
         """Detect if user mentions a new AI initiative in their input."""
+        # Most follow-up turns ("thanks", "ok") can't mention an initiative - skip the LLM for them
+        if not self._NEW_INITIATIVE_TRIGGER_RE.search(user_input):
+            return None
+        
         try:
-            # Use LLM to detect new initiatives
-            detection_prompt = ChatPromptTemplate.from_messages([
-                ("system", """Analyze the user's message to detect if they mention any NEW AI initiatives or projects 
-that are different from what was already discussed.
-
-Look for phrases like:
-- "we're also working on..."
-- "another project is..."
-- "we have a [project type] project"
-- "planning to build..."
-- "developing a..."
-
-Only extract clear, distinct AI initiatives. Don't extract general AI concepts or technologies.
-
-If you find a new initiative, respond with just the initiative name/description (e.g. "voice assistant", "document analysis system", "fraud detection AI").
-If no new initiative is mentioned, respond with "NONE".
-
-Examples:
-User: "We're also planning a voice assistant project" → "voice assistant project"
-User: "Another initiative is document analysis" → "document analysis initiative" 
-User: "That uses machine learning" → "NONE"
-User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
-                ("human", f"User said: {user_input}")
+            # Use LLM to confirm and name the new initiative
+            response = await ainvoke_llm(self.detection_llm, [
+                self.detection_system_message,
+                HumanMessage(content=f"User said: {user_input}")
             ])
-            
-            response = self.llm.invoke(detection_prompt.format_messages())
             result = response.content.strip()
             
             # Return the initiative if found, None if not
@@ -699,7 +1743,7 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
             
             # Start collecting additional initiative
             self.collecting_additional = True
-            self.current_additional_data = {field: None for field in self.slots}
+            self.current_additional_data = self._empty_slot_data.copy()
             self.current_additional_data["Initiative"] = initiative_name
             
             # Add to conversation history
@@ -708,7 +1752,7 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
             return {
                 "message": offer_message,
                 "status": "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
             
@@ -717,12 +1761,13 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
             return {
                 "message": f"That {initiative_name} sounds interesting! Tell me more about it.",
                 "status": "follow_up", 
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
     
-    def _handle_additional_initiative_collection(self, user_input: str) -> Dict[str, Any]:
-        """Handle collection using existing code by temporarily switching context."""
+    async def _ahandle_additional_initiative_collection(self, user_input: str,
+                                                        on_first_tokens: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Collect the additional initiative's fields with the main survey's collection engine."""
         try:
             # Check if user declines to provide details
             if self._is_decline_response(user_input):
@@ -735,80 +1780,50 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
                 return {
                     "message": decline_response,
                     "status": "follow_up",
-                    "collected_data": self.collected_data.copy(),
+                    "collected_data": MappingProxyType(self.collected_data),
                     "missing_fields": []
                 }
             
-            # Save original state
-            original_collected_data = self.collected_data.copy()
-            original_in_follow_up = self.in_follow_up_mode
+            # Same collection engine as the main survey, filling the additional initiative's
+            # own dict - the main initiative's state is left alone
+            _, next_question = await self._acollect_turn(user_input, self.current_additional_data, on_first_tokens)
             
-            try:
-                # Switch to additional initiative collection mode - reuse ALL existing code
-                self.collected_data = self.current_additional_data.copy()
-                self.in_follow_up_mode = False  # Act like normal collection
-                
-                # Use existing process_user_input method completely
-                temp_result = self.process_user_input(user_input)
-                
-                # Copy collected data back
-                self.current_additional_data = self.collected_data.copy()
-                
-                # If collection completed, save and continue follow-up
-                if temp_result['status'] == 'follow_up':  # All fields collected
-                    return self._complete_additional_initiative_collection()
-                
-                # Return the question but keep in follow_up status
-                return {
-                    "message": temp_result['message'],
-                    "status": "follow_up",
-                    "collected_data": original_collected_data,
-                    "missing_fields": []
-                }
-                
-            finally:
-                # Always restore original state
-                self.collected_data = original_collected_data
-                self.in_follow_up_mode = original_in_follow_up
+            # If collection completed, save and continue follow-up
+            if next_question is None:
+                return self._complete_additional_initiative_collection()
+            
+            # Return the question but keep in follow_up status
+            return {
+                "message": next_question,
+                "status": "follow_up",
+                "collected_data": MappingProxyType(self.collected_data),
+                "missing_fields": []
+            }
             
         except Exception as e:
             print(f"Error handling additional initiative collection: {e}")
             return {
                 "message": "Could you please repeat that?",
                 "status": "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
     
     def _is_decline_response(self, user_input: str) -> bool:
         """Check if user declines to provide additional details."""
-        decline_phrases = ["no", "not now", "skip", "maybe later", "not interested", "no thanks"]
-        return any(phrase in user_input.lower() for phrase in decline_phrases)
+        return self._DECLINE_RE.search(user_input) is not None
     
     def _is_agreement_response(self, user_input: str) -> bool:
         """Check if user agrees to provide additional details."""
-        agree_phrases = ["yes", "sure", "ok", "okay", "sounds good", "let's do it", "go ahead"]
-        return any(phrase in user_input.lower() for phrase in agree_phrases)
+        return self._AGREE_RE.search(user_input) is not None
     
     
     def _complete_additional_initiative_collection(self) -> Dict[str, Any]:
         """Complete collection of additional initiative and save to CSV."""
         try:
-            # Save the additional initiative to CSV
+            # Save the additional initiative to CSV (queued to the background uploader)
             print(f"Saving additional initiative: {self.current_additional_data}")
-            
-            def save_additional_csv():
-                try:
-                    print(f"Starting background CSV write for additional initiative")
-                    self.update_initiatives_csv(self.current_additional_data)
-                    print(f"Additional initiative saved to CSV successfully")
-                except Exception as e:
-                    print(f"Failed to save additional initiative to CSV: {e}")
-            
-            # Save in background
-            csv_thread = threading.Thread(target=save_additional_csv)
-            csv_thread.daemon = True
-            csv_thread.start()
+            self.update_initiatives_csv(self.current_additional_data)
             
             # Add to additional initiatives list
             self.additional_initiatives.append(self.current_additional_data.copy())
@@ -825,7 +1840,7 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
             return {
                 "message": completion_message,
                 "status": "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
             
@@ -834,14 +1849,20 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
             return {
                 "message": "Thank you for sharing that information! Is there anything else you'd like to discuss?",
                 "status": "follow_up",
-                "collected_data": self.collected_data.copy(),
+                "collected_data": MappingProxyType(self.collected_data),
                 "missing_fields": []
             }
     
     def get_missing_fields(self) -> List[str]:
         """Get list of fields that still need to be collected."""
+        return self._missing_fields(self.collected_data)
+    
+    @staticmethod
+    def _missing_fields(collected: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> List[str]:
+        """Fields of `collected` (or just `fields`, in order) that have no usable value yet."""
         missing = []
-        for field, value in self.collected_data.items():
+        for field in collected if fields is None else fields:
+            value = collected.get(field)
             if not value or (isinstance(value, str) and not value.strip()):
                 missing.append(field)
         return missing
@@ -855,32 +1876,13 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
         
         return "\n".join(collected) if collected else "No information collected yet."
     
-    def _load_previous_initiatives(self) -> List[Dict[str, Any]]:
-        """Load previous initiatives from storage."""
-        try:
-            initiatives_url = self._build_url("AI_Initiatives.csv")
-            response = requests.get(initiatives_url, timeout=30)
-            
-            if response.status_code == 200:
-                initiatives_csv = StringIO(response.text)
-                df = pd.read_csv(initiatives_csv)
-                print(f"Loaded {len(df)} previous initiatives")
-                return df.to_dict('records')
-            else:
-                print("No previous initiatives found")
-                return []
-                
-        except Exception as e:
-            print(f"Error loading previous initiatives: {e}")
-            return []
-    
     def update_initiatives_csv(self, initiative_data: Dict[str, Any]):
-        """Update AI_Initiatives.csv with new initiative in Azure Blob Storage."""
+        """Update AI_Initiatives.csv with new initiative in Azure Blob Storage.
+        
+        The change is queued to the process-wide InitiativesCSVStore, which applies it to the
+        cached CSV and uploads it in the background.
+        """
         try:
-            import pandas as pd
-            from io import StringIO
-            import requests
-            
             # Azure Blob Storage URLs with SAS token
             sas_token = os.getenv("AZURE_STORAGE_SAS_TOKEN", "")
             base_url = "https://acu1tmagentbotd1saglobal.blob.core.windows.net/csvdata"
@@ -892,70 +1894,8 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
             initiatives_csv_url = f"{base_url}/AI_Initiatives.csv?{sas_token}"
             
             print(f"DEBUG: Updating CSV at Azure Blob Storage")
-            
-            # Read existing initiatives from Azure Blob
-            try:
-                initiatives_response = requests.get(initiatives_csv_url, timeout=30)
-                if initiatives_response.status_code == 200:
-                    initiatives_csv = StringIO(initiatives_response.text)
-                    df = pd.read_csv(initiatives_csv)
-                    print(f"DEBUG: Read {len(df)} existing initiatives from Azure Blob")
-                else:
-                    # File doesn't exist yet, create new DataFrame
-                    df = pd.DataFrame(columns=self.slots)
-                    print(f"DEBUG: No existing initiatives file found, creating new one")
-            except Exception as e:
-                print(f"DEBUG: Error reading from Azure Blob, creating new DataFrame: {e}")
-                df = pd.DataFrame(columns=self.slots)
-            
-            # Check if initiative already exists
-            if 'Initiative' in initiative_data and initiative_data['Initiative']:
-                initiative_name = initiative_data['Initiative']
-                existing_idx = df[df['Initiative'] == initiative_name].index
-                
-                if len(existing_idx) > 0:
-                    # Update existing initiative
-                    print(f"DEBUG: Updating existing initiative: {initiative_name}")
-                    for field, value in initiative_data.items():
-                        if value is not None and value != "":
-                            df.loc[existing_idx[0], field] = value
-                else:
-                    # Add new initiative
-                    print(f"DEBUG: Adding new initiative: {initiative_name}")
-                    new_row = {field: None for field in self.slots}
-                    new_row.update(initiative_data)
-                    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            else:
-                # Add as new initiative without name
-                print(f"DEBUG: Adding new initiative without name")
-                new_row = {field: None for field in self.slots}
-                new_row.update(initiative_data)
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            
-            # Save updated DataFrame back to Azure Blob
-            csv_string = df.to_csv(index=False)
-            print(f"DEBUG: Generated CSV data with {len(df)} initiatives")
-            
-            # Upload back to Azure Blob using PUT request
-            if sas_token:
-                upload_url = f"{base_url}/AI_Initiatives.csv?{sas_token}"
-                headers = {
-                    'x-ms-blob-type': 'BlockBlob',
-                    'Content-Type': 'text/csv'
-                }
-                
-                upload_response = requests.put(upload_url, data=csv_string, headers=headers, timeout=30)
-                
-                if upload_response.status_code in [200, 201]:
-                    print(f"DEBUG: Successfully uploaded AI_Initiatives.csv to Azure Blob")
-                    return True
-                else:
-                    print(f"DEBUG: Failed to upload to Azure Blob. Status: {upload_response.status_code}")
-                    print(f"DEBUG: Response: {upload_response.text}")
-                    return False
-            else:
-                print(f"DEBUG: No SAS token available - cannot upload to Azure Blob")
-                return False
+            get_initiatives_store(initiatives_csv_url, self.slots).save(initiative_data)
+            return True
                 
         except Exception as e:
             print(f"ERROR: Error updating CSV file: {str(e)}")
@@ -964,18 +1904,24 @@ User: "We also do chatbots" → "NONE" (if chatbot was already discussed)"""),
             return False
 
 
+GREETING_FALLBACK = "Hello! I'd love to learn about your AI initiatives. Could you tell me about a project you're working on?"
+
+
 class ConversationSession:
     """Manages individual conversation sessions with proper state management."""
     
-    def __init__(self, session_id: str, user_id: str = None):
+    def __init__(self, session_id: str, user_id: str = None, config: Optional[SurveyAgentConfig] = None):
         self.session_id = session_id
         self.user_id = user_id
-        self.agent = SurveyAgent()
+        self.agent = SurveyAgent(config)
         self.agent.session_id = session_id  # Pass session_id to agent for logging
         self.created_at = datetime.now()
+        self._status_cache: Optional[Dict[str, Any]] = None  # get_status() result until the session changes
         self.last_activity = datetime.now()
         self.status = "active"  # active, follow_up, completed, error
         self.is_first_turn = True
+        self._greeting_future = None  # Greeting generation running on the agent loop
+        self.turn_lock = asyncio.Lock()  # Held by async callers (the API) around each turn
         
         # Start conversation logging
         log_conversation_event(session_id, "session_started", {
@@ -983,121 +1929,184 @@ class ConversationSession:
             "timestamp": self.created_at.isoformat()
         })
         
+    @property
+    def status(self) -> str:
+        return self._status
+    
+    @status.setter
+    def status(self, value: str):
+        self._status = value
+        self._status_cache = None
+    
+    def start_initial_greeting(self, on_first_tokens: Optional[Callable[[str], None]] = None):
+        """Start generating the greeting in the background and return its future.
+        
+        Lets callers overlap greeting latency with other setup (e.g. opening the audio
+        stream); get_initial_greeting() and process_input() wait for it only if still pending.
+        """
+        if self._greeting_future is None:
+            self._greeting_future = asyncio.run_coroutine_threadsafe(
+                self.agent.aget_initial_greeting(on_first_tokens), _get_agent_loop()
+            )
+        return self._greeting_future
+    
     def get_initial_greeting(self) -> str:
         """Get initial greeting for the session."""
         try:
-            greeting = self.agent.get_initial_greeting()
-            self.is_first_turn = False
-            self._update_activity()
-            
-            # Log the initial greeting
-            log_bot_question(self.session_id, greeting, {"type": "initial_greeting"})
-            
-            return greeting
+            return self._record_greeting(self.start_initial_greeting().result())
         except Exception as e:
             print(f"Error getting greeting: {e}")
-            return "Hello! I'd love to learn about your AI initiatives. Could you tell me about a project you're working on?"
+            return GREETING_FALLBACK
     
-    def process_input(self, user_input: str) -> Dict[str, Any]:
-        """Process user input and return response."""
-        start_time = datetime.now() if ENABLE_LATENCY_LOGGING else None
+    async def aget_initial_greeting(self) -> str:
+        """Get initial greeting for the session without blocking the caller's event loop."""
         try:
-            self._update_activity()
-            
-            # Log user input
-            log_user_answer(self.session_id, user_input)
+            return self._record_greeting(await asyncio.wrap_future(self.start_initial_greeting()))
+        except Exception as e:
+            print(f"Error getting greeting: {e}")
+            return GREETING_FALLBACK
+    
+    def _record_greeting(self, greeting: str) -> str:
+        """Mark the greeting as delivered and log it."""
+        self.is_first_turn = False
+        self._update_activity()
+        
+        # Log the initial greeting
+        log_bot_question(self.session_id, greeting, {"type": "initial_greeting"})
+        
+        return greeting
+    
+    def process_input(self, user_input: str,
+                      on_first_tokens: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Process user input and return response (on_first_tokens: see SurveyAgent.aprocess_user_input)."""
+        start_ns = time.perf_counter_ns() if ENABLE_LATENCY_LOGGING else None  # Monotonic clock for the duration
+        try:
+            # A background greeting that hasn't been collected yet must land (and be logged) first
+            if self._greeting_future is not None and self.is_first_turn:
+                self.get_initial_greeting()
             
-            # Process through agent
-            result = self.agent.process_user_input(user_input)
+            self._begin_turn(user_input)
+            result = self.agent.process_user_input(user_input, on_first_tokens)
+            return self._finish_turn(user_input, result, start_ns)
             
-            # Log bot response
-            log_bot_question(self.session_id, result["message"], {
-                "status": result["status"],
-                "missing_fields": result.get("missing_fields", []),
-                "collected_fields": len([v for v in result.get("collected_data", {}).values() if v])
-            })
+        except Exception as e:
+            return self._error_response(e)
+    
+    async def process_input_async(self, user_input: str,
+                                  on_first_tokens: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Async process_input for callers on an event loop (the API); no thread is held during the turn.
+        
+        The agent's coroutine runs on the shared agent loop, where its LLM clients live.
+        """
+        start_ns = time.perf_counter_ns() if ENABLE_LATENCY_LOGGING else None
+        try:
+            if self._greeting_future is not None and self.is_first_turn:
+                await self.aget_initial_greeting()
             
-            # Log any extracted fields with the user's answer
-            collected_data = result.get("collected_data", {})
-            if collected_data:
-                non_empty_fields = {k: v for k, v in collected_data.items() if v}
-                if non_empty_fields:
-                    # Update the last user answer log with extracted fields
-                    log_user_answer(self.session_id, user_input, non_empty_fields, {
-                        "extraction_successful": True,
-                        "fields_count": len(non_empty_fields)
-                    })
+            self._begin_turn(user_input)
+            result = await await_agent_coroutine(self.agent.aprocess_user_input(user_input, on_first_tokens))
+            return self._finish_turn(user_input, result, start_ns)
             
-            # Update session status
-            if result["status"] == "follow_up":
-                self.status = "follow_up"
-                # When entering follow-up mode, save the collected data to CSV
-                def csv_with_error_handling():
-                    try:
-                        print(f"Starting background CSV write for session {self.session_id} (follow-up mode)")
-                        self.agent.update_initiatives_csv(result["collected_data"])
-                        print(f"Background CSV write completed for session {self.session_id}")
-                    except Exception as e:
-                        print(f"Background CSV write failed for session {self.session_id}: {e}")
-                
-                csv_thread = threading.Thread(target=csv_with_error_handling)
-                csv_thread.daemon = True
-                csv_thread.start()
-                
-                # Log transition to follow-up mode
-                log_conversation_event(self.session_id, "entered_follow_up_mode", {
-                    "completion_reason": "all_fields_collected",
-                    "collected_data": result["collected_data"]
-                })
-                
-            elif result["status"] == "completed":
-                self.status = "completed"
-                
-                # Log conversation completion and save conversation log
-                log_conversation_event(self.session_id, "session_completed", {
-                    "completion_reason": "user_ended_conversation",
-                    "final_data": result["collected_data"]
-                })
-                
-                # Save the complete conversation log to Azure Blob
-                def save_log_with_error_handling():
-                    try:
-                        print(f"Saving conversation log for session {self.session_id}")
-                        save_conversation(self.session_id, self.user_id)
-                        print(f"Conversation log saved for session {self.session_id}")
-                    except Exception as e:
-                        print(f"Failed to save conversation log for session {self.session_id}: {e}")
-                
-                log_thread = threading.Thread(target=save_log_with_error_handling)
-                log_thread.daemon = True
-                log_thread.start()
-            
-            # Log processing latency (thread-safe)
-            if ENABLE_LATENCY_LOGGING and start_time:
-                end_time = datetime.now()
-                latency_ms = (end_time - start_time).total_seconds() * 1000
-                safe_log_event(self.session_id, "processing_latency", {
-                    "total_ms": round(latency_ms, 2),
-                    "status": result["status"],
-                    "start_time": start_time.isoformat(),
-                    "end_time": end_time.isoformat()
+        except Exception as e:
+            return self._error_response(e)
+    
+    def _begin_turn(self, user_input: str):
+        """Record activity and log the user's input before the agent runs."""
+        self._update_activity()
+        
+        # Log user input
+        log_user_answer(self.session_id, user_input)
+    
+    def _finish_turn(self, user_input: str, result: Dict[str, Any], start_ns: Optional[int]) -> Dict[str, Any]:
+        """Log the agent's result, update session status and queue any background saves."""
+        self._status_cache = None  # The turn may have filled fields
+        
+        # Snapshot the agent's read-only collected_data view once for logging,
+        # the background CSV write and the API response
+        result["collected_data"] = dict(result["collected_data"])
+        
+        # Log bot response
+        log_bot_question(self.session_id, result["message"], {
+            "status": result["status"],
+            "missing_fields": result.get("missing_fields", []),
+            "collected_fields": len([v for v in result.get("collected_data", {}).values() if v])
+        })
+        
+        # Log any extracted fields with the user's answer
+        collected_data = result.get("collected_data", {})
+        if collected_data:
+            non_empty_fields = {k: v for k, v in collected_data.items() if v}
+            if non_empty_fields:
+                # Update the last user answer log with extracted fields
+                log_user_answer(self.session_id, user_input, non_empty_fields, {
+                    "extraction_successful": True,
+                    "fields_count": len(non_empty_fields)
                 })
+        
+        # Update session status
+        if result["status"] == "follow_up":
+            self.status = "follow_up"
+            # When entering follow-up mode, save the collected data to CSV (queued to the
+            # background uploader, which coalesces it with other sessions' saves)
+            print(f"Queueing CSV write for session {self.session_id} (follow-up mode)")
+            self.agent.update_initiatives_csv(result["collected_data"])
+            
+            # Log transition to follow-up mode
+            log_conversation_event(self.session_id, "entered_follow_up_mode", {
+                "completion_reason": "all_fields_collected",
+                "collected_data": result["collected_data"]
+            })
+        
+        elif result["status"] == "completed":
+            self.status = "completed"
             
-            return result
+            # Log conversation completion and save conversation log
+            log_conversation_event(self.session_id, "session_completed", {
+                "completion_reason": "user_ended_conversation",
+                "final_data": result["collected_data"]
+            })
             
-        except Exception as e:
-            print(f"Error processing input: {e}")
-            self.status = "error"
-            return {
-                "message": "I apologize, but I encountered an error. Could you please try again?",
-                "status": "error",
-                "collected_data": self.agent.collected_data.copy(),
-                "missing_fields": self.agent.get_missing_fields()
-            }
+            # Save the complete conversation log to Azure Blob
+            def save_log_with_error_handling():
+                try:
+                    print(f"Saving conversation log for session {self.session_id}")
+                    save_conversation(self.session_id, self.user_id)
+                    print(f"Conversation log saved for session {self.session_id}")
+                except Exception as e:
+                    print(f"Failed to save conversation log for session {self.session_id}: {e}")
+            
+            _upload_pool.submit(save_log_with_error_handling)
+        
+        # Log processing latency (thread-safe)
+        if start_ns is not None:
+            latency_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            # One wall-clock read for the log record; the start is derived from the duration
+            end_time = datetime.now()
+            start_time = end_time - timedelta(milliseconds=latency_ms)
+            safe_log_event(self.session_id, "processing_latency", {
+                "total_ms": round(latency_ms, 2),
+                "status": result["status"],
+                "start_time": start_time.isoformat(),
+                "end_time": end_time.isoformat()
+            })
+        
+        return result
+    
+    def _error_response(self, error: Exception) -> Dict[str, Any]:
+        """Put the session in error state and return the error reply."""
+        print(f"Error processing input: {error}")
+        self.status = "error"
+        return {
+            "message": "I apologize, but I encountered an error. Could you please try again?",
+            "status": "error",
+            "collected_data": self.agent.collected_data.copy(),
+            "missing_fields": self.agent.get_missing_fields()
+        }
     
     def _update_activity(self):
         """Update last activity timestamp."""
         self.last_activity = datetime.now()
+        self._status_cache = None
     
     def is_expired(self, timeout_hours: int = 2) -> bool:
         """Check if session has expired."""
@@ -1105,15 +2114,17 @@ class ConversationSession:
         return self.last_activity < cutoff
     
     def get_status(self) -> Dict[str, Any]:
-        """Get current session status."""
-        return {
-            "session_id": self.session_id,
-            "status": self.status,
-            "collected_data": self.agent.collected_data.copy(),
-            "missing_fields": self.agent.get_missing_fields(),
-            "created_at": self.created_at.isoformat(),
-            "last_activity": self.last_activity.isoformat()
-        }
+        """Get current session status (cached until the session changes; treat as read-only)."""
+        if self._status_cache is None:
+            self._status_cache = {
+                "session_id": self.session_id,
+                "status": self.status,
+                "collected_data": self.agent.collected_data.copy(),
+                "missing_fields": self.agent.get_missing_fields(),
+                "created_at": self.created_at.isoformat(),
+                "last_activity": self.last_activity.isoformat()
+            }
+        return self._status_cache
 
 
 # Test function
@@ -1158,6 +2169,13 @@ def test_survey_agent():
         # Print final collected data
         print(f"\nFinal collected data: {session.agent.collected_data}")
         
+        # Replay the same turns offline with a single batched extraction call
+        replay_agent = SurveyAgent()
+        replay_agent.session_id = "test-session-replay"
+        for test_input in test_inputs:
+            replay_agent.queue_user_input(test_input)
+        print(f"Batched replay collected data: {replay_agent.flush()}")
+        
     except Exception as e:
         print(f"Test error: {e}")
         import traceback
@@ -1,5 +1,7 @@
+import copy
 import csv
 import json
+import threading
 import pandas as pd
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate, ChatPromptTemplate, MessagesPlaceholder
@@ -9,7 +11,13 @@ import re
 import requests
 from io import StringIO
 
+# Stand-in for the snippet while pre-rendering the extraction prompt
+_SNIPPET_MARKER = "\x00snippet\x00"
+
 class SurveyAgent:
+    _shared = None
+    _shared_lock = threading.Lock()
+    
     def __init__(self):
         # Initialize LLM with GPT-4 mini for higher rate limits
         self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
@@ -63,8 +71,7 @@ class SurveyAgent:
         self.collected_data = {field: None for field in self.slots}
 
         # Load previous initiatives
-        self.previous_initiatives = self.load_previous_initiatives()
-        self.previous_initiatives_context = self.format_previous_initiatives_context(self.previous_initiatives)
+        self.refresh_previous_initiatives()
         
         # Update system message to enforce better context usage
         self.system_message = """You are a friendly, conversational assistant representing the AI Centre of Excellence at our Software Services company. You speak to Customer Account Reps to gather AI-initiative details. At each turn, think step by step and emit your reasoning before asking your question.
@@ -247,6 +254,14 @@ class SurveyAgent:
             template=self.extraction_template
         )
 
+        # Slots are fixed once loaded, so render everything but the snippet once and
+        # join the snippet in per call instead of formatting the template every turn
+        fwd = "\n".join([f"- {f}: {self.definitions[f]}" for f in self.slots])
+        self._extraction_prefix, self._extraction_suffix = self.extraction_prompt.format(
+            fields_with_definitions=fwd,
+            snippet=_SNIPPET_MARKER
+        ).split(_SNIPPET_MARKER)
+
         # Add field-specific cleaning functions
         self.field_cleaners = {
             'Budget': self._clean_budget,
@@ -258,6 +273,27 @@ class SurveyAgent:
         # Add transcript storage
         self.transcript = []
 
+    @classmethod
+    def get_shared(cls):
+        """Process-wide agent: LLM client, prompts and CSV context are loaded once"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+    
+    def for_session(self):
+        """Shallow copy sharing the loaded LLM, prompts and context, with fresh per-session state"""
+        session_agent = copy.copy(self)
+        session_agent.collected_data = {field: None for field in self.slots}
+        session_agent.transcript = []
+        return session_agent
+    
+    def refresh_previous_initiatives(self):
+        """Reload previous initiatives from the blob and rebuild their prompt context"""
+        self.previous_initiatives = self.load_previous_initiatives()
+        self.previous_initiatives_context = self.format_previous_initiatives_context(self.previous_initiatives)
+
     def _clean_budget(self, value):
         """Clean and standardize budget format."""
         if not value:
@@ -369,14 +405,8 @@ class SurveyAgent:
 
     def extract_all_fields_working_copy(self, snippet):
         """Extract field values from conversation snippet using LLM."""
-        # Create the fields with definitions string
-        fwd = "\n".join([f"- {f}: {self.definitions[f]}" for f in self.slots])
-        
         # Format the extraction prompt
-        prompt_text = self.extraction_prompt.format(
-            fields_with_definitions=fwd,
-            snippet=snippet
-        )
+        prompt_text = self._extraction_prefix + snippet + self._extraction_suffix
         
         print("\nDEBUG: Extraction prompt:")
         print(f"DEBUG: Snippet being analyzed: {snippet}")
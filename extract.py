@@ -0,0 +1,52 @@
+"""Answer-extraction logic shared by test_real_problem.py and test_simple_fix.py"""
+
+_ANSWER = "Answer:"
+_THOUGHT5 = "Thought 5:"
+
+# (marker, keep only the last question of the text after it); new formats go here
+_SECTIONS = ((_ANSWER, False), (_THOUGHT5, True))
+
+def _last_question(s):
+    """Sentence ending at the last '?' (scanning back from it), or None if there is no question"""
+    q = s.rfind('?')
+    if q < 0:
+        return None
+    start = max(s.rfind('.', 0, q), s.rfind('\n', 0, q)) + 1
+    return s[start:q + 1].strip()
+
+# Current logic (problematic)
+def current_logic(assistant_msg):
+    if _ANSWER in assistant_msg:
+        return assistant_msg.rpartition(_ANSWER)[2].strip()
+    elif _THOUGHT5 in assistant_msg:
+        thought5_section = assistant_msg.rpartition(_THOUGHT5)[2].strip()
+        if "?" in thought5_section:
+            sentences = thought5_section.split(".")
+            for sentence in reversed(sentences):
+                if "?" in sentence:
+                    return sentence.strip()
+                    break
+            else:
+                return thought5_section
+        else:
+            return thought5_section
+    else:
+        return assistant_msg  # ❌ PROBLEM: returns entire response
+
+# Simple fix - section markers first, then the last question
+def simple_fix(assistant_msg):
+    # Try the sections in priority order (Answer: first, then Thought 5:)
+    for marker, question_only in _SECTIONS:
+        idx = assistant_msg.rfind(marker)
+        if idx != -1:
+            section = assistant_msg[idx + len(marker):].strip()
+            return (question_only and _last_question(section)) or section
+    
+    # NEW: If neither section exists, find the last question
+    question = _last_question(assistant_msg)
+    if question:
+        return question
+    
+    # Final fallback: last non-empty line (trailing blank lines stripped, then one rfind)
+    stripped = assistant_msg.rstrip()
+    return stripped[stripped.rfind('\n') + 1:].strip() or assistant_msg
@@ -7,26 +7,100 @@ Zero impact on existing Azure VAD pipeline.
 
 import torch
 import numpy as np
+import base64
+import copy
+import os
 import time
 import logging
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+import threading
+from abc import ABC, abstractmethod
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 import asyncio
-from collections import deque
+from collections import OrderedDict, deque
 import io
 import wave
 from datetime import datetime
 
+try:
+    import onnxruntime as ort  # Optional: VAD_BACKEND=onnx
+except ImportError:
+    ort = None
+
+try:
+    import orjson  # Optional: faster response serialization
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
+
+try:
+    from silero_vad import get_speech_timestamps  # Optional: file timestamps when the hub utils aren't loaded
+except ImportError:
+    get_speech_timestamps = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "torch" (TorchScript model from torch hub) or "onnx" (ONNX Runtime)
+VAD_BACKEND = os.environ.get("VAD_BACKEND", "torch").lower()
+VAD_ONNX_PATH = os.environ.get("VAD_ONNX_PATH")  # Local silero_vad.onnx; downloaded when unset
+VAD_ONNX_URL = "https://github.com/snakers4/silero-vad/raw/master/src/silero_vad/data/silero_vad.onnx"
+
+# Script + freeze the model at load time (set VAD_JIT_OPTIMIZE=0 to keep the model as loaded)
+VAD_JIT_OPTIMIZE = os.environ.get("VAD_JIT_OPTIMIZE", "1") == "1"
+
+# Threads per model call. Keep at 1 and scale out with uvicorn workers: requests are already
+# batched across sessions, and more intra-op threads per worker only oversubscribe the cores
+VAD_THREADS = int(os.environ.get("VAD_THREADS", "1"))
+
+# Silero VAD's fixed window sizes
+WARMUP_WINDOWS = {16000: 512, 8000: 256}
+
+PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+def pcm16_to_tensor(audio_bytes: bytes) -> torch.Tensor:
+    """16-bit PCM bytes -> float32 tensor in [-1, 1).
+    
+    The int16 view of the bytes is cast and scaled in a single ufunc pass, and the result is
+    shared with the tensor (no copy). Each call returns a fresh tensor: the model keeps a
+    view of the last input as its context window, so input buffers must not be reused.
+    """
+    return torch.from_numpy(np.multiply(np.frombuffer(audio_bytes, dtype="<i2"), PCM16_SCALE, dtype=np.float32))
+
+def decode_audio_file(content: bytes, filename: str) -> tuple:
+    """Uploaded WAV (or raw 16 kHz PCM) bytes -> (1-D float32 tensor, sample rate)"""
+    if filename.lower().endswith('.wav'):
+        with wave.open(io.BytesIO(content), 'rb') as wav_file:
+            audio_tensor = pcm16_to_tensor(wav_file.readframes(-1))
+            channels = wav_file.getnchannels()
+            if channels > 1:
+                # Downmix interleaved channels to mono
+                audio_tensor = torch.from_numpy(audio_tensor.numpy().reshape(-1, channels).mean(axis=1))
+            return audio_tensor, wav_file.getframerate()
+    return pcm16_to_tensor(content), 16000
+
+# base64 payloads above this size are decoded in the threadpool instead of on the event loop
+BASE64_THREADPOOL_BYTES = 1 << 20
+
+# Micro-batch concurrent /vad/detect forwards into one model call (off by default: unless the
+# model keeps explicit per-session state, batched chunks are scored from a fresh state)
+VAD_BATCHING = os.environ.get("VAD_BATCHING", "0") == "1"
+VAD_BATCH_MAX_SIZE = int(os.environ.get("VAD_BATCH_MAX_SIZE", "16"))
+VAD_BATCH_WAIT_MS = float(os.environ.get("VAD_BATCH_WAIT_MS", "10"))
+
+# Session states are evicted after this long without a chunk, or least recently used first past the cap
+VAD_SESSION_TTL_S = float(os.environ.get("VAD_SESSION_TTL_S", "7200"))
+VAD_SESSION_MAX = int(os.environ.get("VAD_SESSION_MAX", "10000"))
+
 app = FastAPI(
     title="Silero VAD Service", 
     description="Isolated Voice Activity Detection service for Teams bot integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 class VADConfig(BaseModel):
@@ -53,6 +127,21 @@ class VADResponse(BaseModel):
     session_state: str = Field(..., description="Current session state")
     processing_time_ms: float = Field(..., description="Processing time in milliseconds")
 
+class SpeechSegment(BaseModel):
+    """Speech segment within an audio file"""
+    start: int = Field(..., description="Start offset (samples)")
+    end: int = Field(..., description="End offset (samples)")
+    start_ms: float = Field(..., description="Start offset (ms)")
+    end_ms: float = Field(..., description="End offset (ms)")
+
+class VADFileResponse(BaseModel):
+    """Whole-file VAD response"""
+    session_id: str
+    sample_rate: int
+    audio_duration_ms: float
+    speech_segments: List[SpeechSegment]
+    processing_time_ms: float
+
 class VADHealthResponse(BaseModel):
     """Health check response"""
     status: str
@@ -61,6 +150,254 @@ class VADHealthResponse(BaseModel):
     total_requests: int
     average_processing_time_ms: float
 
+class StatefulVADModel(ABC):
+    """Silero VAD wrapper with explicit recurrent state.
+    
+    run() takes and returns the state, so callers can keep one per stream; calling the
+    model directly uses a single internal state, like the TorchScript model.
+    """
+    
+    CONTEXT_SAMPLES = {16000: 64, 8000: 32}
+    STATE_BATCH_AXES = {"state": 1, "context": 0, "h": 1, "c": 1}
+    _concat = staticmethod(np.concatenate)
+    
+    _state: Optional[Dict[str, Any]] = None
+    
+    @abstractmethod
+    def initial_state(self, sample_rate: int, batch_size: int = 1) -> Dict[str, Any]:
+        """Zero state for a new stream"""
+    
+    @abstractmethod
+    def run(self, audio, sample_rate: int, state: Optional[Dict[str, Any]] = None) -> tuple:
+        """Speech probabilities for a (batch, samples) float32 array; returns (probs, new_state)"""
+    
+    def stack_states(self, states: List[Optional[Dict[str, Any]]], sample_rate: int) -> Dict[str, Any]:
+        """Combine single-stream states (None for a new stream) into one batch state"""
+        parts = [s if s is not None and s["sample_rate"] == sample_rate and s["batch_size"] == 1
+                 else self.initial_state(sample_rate) for s in states]
+        merged = {"sample_rate": sample_rate, "batch_size": len(parts)}
+        for key, axis in self.STATE_BATCH_AXES.items():
+            if key in parts[0]:
+                merged[key] = self._concat([p[key] for p in parts], axis)
+        return merged
+    
+    def split_state(self, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Inverse of stack_states"""
+        keys = [(key, (slice(None),) * axis) for key, axis in self.STATE_BATCH_AXES.items() if key in state]
+        return [{"sample_rate": state["sample_rate"], "batch_size": 1,
+                 **{key: state[key][lead + (slice(i, i + 1),)] for key, lead in keys}}
+                for i in range(state["batch_size"])]
+    
+    def __call__(self, audio_tensor: torch.Tensor, sample_rate: int) -> torch.Tensor:
+        probs, self._state = self.run(audio_tensor.reshape(-1, audio_tensor.shape[-1]), sample_rate, self._state)
+        return torch.as_tensor(probs)
+    
+    def reset_states(self):
+        self._state = None
+
+class OnnxVADModel(StatefulVADModel):
+    """Silero VAD on ONNX Runtime.
+    
+    Supports both the v5 graph (input + state, with a context window of the previous
+    chunk's tail) and the v4 graph (input + h/c).
+    """
+    
+    def __init__(self, path: str):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = VAD_THREADS
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.stateful_v5 = "state" in {i.name for i in self.session.get_inputs()}
+    
+    def initial_state(self, sample_rate: int, batch_size: int = 1) -> Dict[str, Any]:
+        state = {"sample_rate": sample_rate, "batch_size": batch_size}
+        if self.stateful_v5:
+            state["state"] = np.zeros((2, batch_size, 128), dtype=np.float32)
+            state["context"] = np.zeros((batch_size, self.CONTEXT_SAMPLES[sample_rate]), dtype=np.float32)
+        else:
+            state["h"] = np.zeros((2, batch_size, 64), dtype=np.float32)
+            state["c"] = np.zeros((2, batch_size, 64), dtype=np.float32)
+        return state
+    
+    def run(self, audio, sample_rate: int, state: Optional[Dict[str, Any]] = None) -> tuple:
+        audio = np.asarray(audio, dtype=np.float32)
+        batch_size = audio.shape[0]
+        if state is None or state["sample_rate"] != sample_rate or state["batch_size"] != batch_size:
+            state = self.initial_state(sample_rate, batch_size)
+        sr = np.array(sample_rate, dtype=np.int64)
+        
+        new_state = {"sample_rate": sample_rate, "batch_size": batch_size}
+        if self.stateful_v5:
+            model_input = np.concatenate([state["context"], audio], axis=1)
+            probs, new_state["state"] = self.session.run(None, {"input": model_input, "state": state["state"], "sr": sr})
+            new_state["context"] = model_input[:, -state["context"].shape[1]:]
+        else:
+            probs, new_state["h"], new_state["c"] = self.session.run(
+                None, {"input": audio, "sr": sr, "h": state["h"], "c": state["c"]})
+        return probs, new_state
+
+class SpecializedTorchVADModel(StatefulVADModel):
+    """Silero v5 TorchScript model split into one frozen forward per sample rate.
+    
+    The hub model wraps a stateless 16 kHz and 8 kHz network (_model / _model_8k) in a
+    forward that dispatches on the rate and keeps the state on the module. Freezing each
+    network on its own constant-folds it for its rate, and holding the state here lets
+    every stream (and every row of a batch) keep its own.
+    """
+    
+    SUBMODULES = {16000: "_model", 8000: "_model_8k"}
+    _concat = staticmethod(lambda tensors, axis: torch.cat(tensors, dim=axis))
+    
+    def __init__(self, model: torch.jit.ScriptModule):
+        self.forward_by_sr = {
+            sample_rate: torch.jit.optimize_for_inference(torch.jit.freeze(getattr(model, name).eval()))
+            for sample_rate, name in self.SUBMODULES.items()
+        }
+    
+    @classmethod
+    def supports(cls, model) -> bool:
+        return all(hasattr(model, name) for name in cls.SUBMODULES.values())
+    
+    def initial_state(self, sample_rate: int, batch_size: int = 1) -> Dict[str, Any]:
+        return {
+            "sample_rate": sample_rate,
+            "batch_size": batch_size,
+            "state": torch.zeros(2, batch_size, 128),
+            "context": torch.zeros(batch_size, self.CONTEXT_SAMPLES[sample_rate])
+        }
+    
+    def run(self, audio, sample_rate: int, state: Optional[Dict[str, Any]] = None) -> tuple:
+        audio = torch.as_tensor(audio)
+        if sample_rate not in self.forward_by_sr or audio.shape[-1] != WARMUP_WINDOWS[sample_rate]:
+            raise ValueError(f"Unsupported chunk: {audio.shape[-1]} samples at {sample_rate} Hz "
+                             f"(supported: {WARMUP_WINDOWS})")
+        batch_size = audio.shape[0]
+        if state is None or state["sample_rate"] != sample_rate or state["batch_size"] != batch_size:
+            state = self.initial_state(sample_rate, batch_size)
+        
+        model_input = torch.cat([state["context"], audio], dim=1)
+        probs, new_state = self.forward_by_sr[sample_rate](model_input, state["state"])
+        return probs, {
+            "sample_rate": sample_rate,
+            "batch_size": batch_size,
+            "state": new_state,
+            "context": model_input[:, -state["context"].shape[1]:]
+        }
+
+class VADBatcher:
+    """Collects forward passes for a short window and runs them as one batched model call"""
+    
+    def __init__(self, processor: "SileroVADProcessor", max_size: int = VAD_BATCH_MAX_SIZE,
+                 max_wait_ms: float = VAD_BATCH_WAIT_MS):
+        self.processor = processor
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the batching loop (call from the running event loop)"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def infer(self, audio_tensor: torch.Tensor, sample_rate: int,
+                    session_state: Optional[Dict[str, Any]] = None) -> float:
+        """Queue one chunk and wait for its speech probability"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((audio_tensor, sample_rate, session_state, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            pending = [await self._queue.get()]
+            await asyncio.sleep(self.max_wait)  # Let concurrent requests join this batch
+            while len(pending) < self.max_size and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            
+            # Chunks can only be stacked with others of the same rate and length
+            groups: Dict[tuple, List[tuple]] = {}
+            for item in pending:
+                groups.setdefault((item[1], item[0].shape[0]), []).append(item)
+            
+            for (sample_rate, _), items in groups.items():
+                try:
+                    probs = self.processor.forward_batch(torch.stack([item[0] for item in items]), sample_rate,
+                                                         [item[2] for item in items])
+                    for (_, _, _, future), prob in zip(items, probs):
+                        if not future.done():
+                            future.set_result(prob)
+                except Exception as e:
+                    logger.error(f"Batched VAD forward failed: {e}")
+                    for _, _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+
+class SessionStore:
+    """Bounded session-state map with a sliding TTL.
+    
+    Entries are kept in least-recently-used order, which is also expiry order, so
+    expiring and evicting only ever pop from the front.
+    """
+    
+    def __init__(self, maxsize: int = VAD_SESSION_MAX, ttl: float = VAD_SESSION_TTL_S):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # session_id -> (expires_at, state)
+        self._lock = threading.Lock()
+    
+    def expire(self):
+        """Drop sessions whose TTL has passed"""
+        with self._lock:
+            self._expire(time.monotonic())
+    
+    def _expire(self, now: float):
+        while self._data:
+            session_id, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[session_id]
+            logger.info(f"Expired session: {session_id}")
+    
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Session state (refreshing its TTL), or None"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            self._data[session_id] = (now + self.ttl, entry[1])
+            self._data.move_to_end(session_id)
+            return entry[1]
+    
+    def __setitem__(self, session_id: str, state: Dict[str, Any]):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._data[session_id] = (now + self.ttl, state)
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                logger.info(f"Evicted session: {evicted}")
+    
+    def __delitem__(self, session_id: str):
+        with self._lock:
+            del self._data[session_id]
+    
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+    
+    def __len__(self) -> int:
+        self.expire()
+        return len(self._data)
+    
+    def items(self) -> List[tuple]:
+        """Snapshot of (session_id, state) pairs"""
+        with self._lock:
+            self._expire(time.monotonic())
+            return [(session_id, state) for session_id, (_, state) in self._data.items()]
+
 class SileroVADProcessor:
     """Core Silero VAD processing engine"""
     
@@ -70,9 +407,11 @@ class SileroVADProcessor:
         self.config = VADConfig()
         self.is_loaded = False
         self.load_time = time.time()
+        self.batcher: Optional[VADBatcher] = None  # Set on startup when VAD_BATCHING is on
         
         # Session state tracking
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.sessions = SessionStore()
+        self._state_owner: Optional[str] = None  # Session whose audio the torch model's state reflects
         
         # Performance metrics
         self.total_requests = 0
@@ -85,6 +424,20 @@ class SileroVADProcessor:
         try:
             logger.info("Loading Silero VAD model...")
             
+            torch.set_grad_enabled(False)
+            torch.set_num_threads(VAD_THREADS)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass  # Can only be set before the first parallel op (e.g. on a model reload)
+            
+            if VAD_BACKEND == "onnx":
+                self.model = self._load_onnx_model()
+                self._warmup(self.model)
+                self.is_loaded = True
+                logger.info("✅ Silero VAD model loaded successfully (ONNX Runtime)")
+                return
+            
             # Load model from torch hub
             self.model, self.utils = torch.hub.load(
                 repo_or_dir='snakers4/silero-vad',
@@ -96,6 +449,9 @@ class SileroVADProcessor:
             # Set model to evaluation mode
             self.model.eval()
             
+            if VAD_JIT_OPTIMIZE:
+                self.model = self._optimize_model(self.model)
+            
             self.is_loaded = True
             logger.info("✅ Silero VAD model loaded successfully")
             
@@ -104,20 +460,131 @@ class SileroVADProcessor:
             self.is_loaded = False
             raise
     
+    def _load_onnx_model(self) -> OnnxVADModel:
+        """Load silero_vad.onnx (VAD_ONNX_PATH, or downloaded once into the torch hub dir)"""
+        if ort is None:
+            raise RuntimeError("VAD_BACKEND=onnx requires the onnxruntime package")
+        
+        path = VAD_ONNX_PATH
+        if not path:
+            path = os.path.join(torch.hub.get_dir(), "silero_vad.onnx")
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                torch.hub.download_url_to_file(VAD_ONNX_URL, path)
+        return OnnxVADModel(path)
+    
+    def _optimize_model(self, model):
+        """Script, freeze and optimize the model for inference, then warm it up at both sample rates"""
+        try:
+            scripted = model if isinstance(model, torch.jit.ScriptModule) else torch.jit.script(model)
+        except Exception as e:
+            logger.warning(f"⚠️ TorchScript conversion failed, using eager model: {e}")
+            return model
+        
+        specialized = self._specialize_model(scripted)
+        if specialized is not None:
+            return specialized
+        
+        try:
+            # reset_states is called between streams, so it must survive freezing
+            preserved = ["reset_states"] if hasattr(scripted, "reset_states") else []
+            frozen = torch.jit.freeze(scripted, preserved_attrs=preserved)
+            optimized = torch.jit.optimize_for_inference(frozen, other_methods=preserved)
+        except Exception as e:
+            logger.warning(f"⚠️ TorchScript freeze failed, using scripted model: {e}")
+            optimized = scripted
+        
+        try:
+            self._warmup(optimized)
+        except Exception as e:
+            if optimized is scripted:
+                raise
+            logger.warning(f"⚠️ Frozen model failed warmup, using scripted model: {e}")
+            optimized = scripted
+            self._warmup(optimized)
+        
+        logger.info(f"Silero VAD model optimized ({type(optimized).__name__})")
+        return optimized
+    
+    def _specialize_model(self, scripted) -> Optional[SpecializedTorchVADModel]:
+        """Per-sample-rate frozen model, if the model has that structure and matches the original"""
+        if not SpecializedTorchVADModel.supports(scripted):
+            return None
+        try:
+            specialized = SpecializedTorchVADModel(scripted)
+            
+            # Same probabilities as the original over a few consecutive chunks at each rate
+            generator = torch.Generator().manual_seed(0)
+            max_diff = 0.0
+            with torch.inference_mode():
+                for sample_rate, window in WARMUP_WINDOWS.items():
+                    scripted.reset_states()
+                    specialized.reset_states()
+                    for _ in range(4):
+                        chunk = torch.rand(window, generator=generator) * 0.2 - 0.1
+                        max_diff = max(max_diff, abs(scripted(chunk, sample_rate).item() - specialized(chunk, sample_rate).item()))
+            scripted.reset_states()
+            if max_diff > 1e-4:
+                logger.warning(f"⚠️ Specialized model differs from the original (max diff {max_diff:.2e}), not using it")
+                return None
+            
+            self._warmup(specialized)
+            logger.info(f"Silero VAD model specialized per sample rate ({', '.join(map(str, WARMUP_WINDOWS))} Hz)")
+            return specialized
+        except Exception as e:
+            logger.warning(f"⚠️ Per-sample-rate specialization failed, freezing the full model: {e}")
+            return None
+    
+    def _warmup(self, model):
+        """Run the first (specializing) calls at load time instead of on the first request"""
+        with torch.inference_mode():
+            for sample_rate, window in WARMUP_WINDOWS.items():
+                for _ in range(2):
+                    model(torch.zeros(window), sample_rate)
+        if hasattr(model, "reset_states"):
+            model.reset_states()
+    
+    def forward_batch(self, batch: torch.Tensor, sample_rate: int,
+                      session_states: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[float]:
+        """Speech probability for each row of a (batch, samples) tensor"""
+        if isinstance(self.model, StatefulVADModel) and session_states is not None:
+            # Each row continues its own session's recurrent state
+            state = self.model.stack_states([s.get('model_state') if s else None for s in session_states], sample_rate)
+            probs, state = self.model.run(batch, sample_rate, state)
+            for session_state, row_state in zip(session_states, self.model.split_state(state)):
+                if session_state is not None:
+                    session_state['model_state'] = row_state
+            return probs.flatten().tolist()
+        
+        self._state_owner = None
+        with torch.inference_mode():
+            # Rows belong to different sessions, so don't carry the previous batch's state over
+            if hasattr(self.model, "reset_states"):
+                self.model.reset_states()
+            return self.model(batch, sample_rate).flatten().tolist()
+    
     def get_session_state(self, session_id: str) -> Dict[str, Any]:
         """Get or create session state"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = {
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = {
                 'is_speech': False,
                 'speech_start_time': None,
                 'last_speech_time': None,
                 'speech_segments': [],
+                'model_state': None,  # Recurrent VAD state carried between this session's chunks
+                'lock': asyncio.Lock(),  # Serializes this session's chunks
                 'created_at': time.time()
             }
-        return self.sessions[session_id]
+            self.sessions[session_id] = state
+        return state
     
-    def cleanup_old_sessions(self, max_age_hours: float = 2.0):
-        """Clean up old sessions"""
+    def cleanup_old_sessions(self, max_age_hours: Optional[float] = None):
+        """Expire idle sessions, and optionally drop any created more than max_age_hours ago"""
+        self.sessions.expire()
+        if max_age_hours is None:
+            return
+        
         current_time = time.time()
         old_sessions = []
         
@@ -130,8 +597,38 @@ class SileroVADProcessor:
             del self.sessions[session_id]
             logger.info(f"Cleaned up old session: {session_id}")
     
-    async def detect_speech(self, audio_data: np.ndarray, session_id: str, config: VADConfig) -> VADResponse:
-        """Process audio chunk and detect speech activity"""
+    async def speech_timestamps(self, audio_tensor: torch.Tensor, config: VADConfig) -> List[Dict[str, int]]:
+        """Speech segments over a whole recording, using Silero's get_speech_timestamps"""
+        if not self.is_loaded:
+            raise HTTPException(status_code=503, detail="VAD model not loaded")
+        timestamps_fn = self.utils[0] if self.utils else get_speech_timestamps
+        if timestamps_fn is None:
+            raise HTTPException(status_code=503, detail="Speech timestamps need the torch hub utils or the silero-vad package")
+        
+        kwargs = dict(
+            threshold=config.threshold,
+            sampling_rate=config.sample_rate,
+            min_speech_duration_ms=config.min_speech_duration,
+            min_silence_duration_ms=config.min_silence_duration,
+            speech_pad_ms=config.speech_pad_ms
+        )
+        if isinstance(self.model, StatefulVADModel):
+            # A copy with its own state shares the underlying (thread-safe) model, so run it off the event loop
+            model = copy.copy(self.model)
+            model.reset_states()
+            return await run_in_threadpool(timestamps_fn, audio_tensor, model, **kwargs)
+        
+        # The TorchScript model's single state is shared with streaming sessions: run inline and
+        # make the next streaming chunk start from a fresh state
+        self._state_owner = None
+        try:
+            with torch.inference_mode():
+                return timestamps_fn(audio_tensor, self.model, **kwargs)
+        finally:
+            self._state_owner = None
+    
+    async def detect_speech(self, audio_tensor: torch.Tensor, session_id: str, config: VADConfig) -> Dict[str, Any]:
+        """Process a 1-D audio chunk and detect speech activity (returns the VADResponse fields as a dict)"""
         start_time = time.time()
         
         if not self.is_loaded:
@@ -140,84 +637,88 @@ class SileroVADProcessor:
         try:
             # Get session state
             session_state = self.get_session_state(session_id)
-            current_timestamp = time.time()
-            
-            # Convert to float32 and normalize
-            if audio_data.dtype != np.float32:
-                audio_float = audio_data.astype(np.float32) / 32768.0
-            else:
-                audio_float = audio_data
-            
-            # Ensure correct shape
-            if len(audio_float.shape) > 1:
-                audio_float = audio_float.flatten()
-            
-            # Convert to tensor
-            audio_tensor = torch.from_numpy(audio_float)
-            
-            # Get VAD prediction
-            with torch.no_grad():
-                speech_prob = self.model(audio_tensor, config.sample_rate).item()
-            
-            # Update speech state
-            is_speech_detected = speech_prob > config.threshold
-            speech_start = None
-            speech_end = None
-            speech_duration = None
-            session_state_str = "listening"
-            
-            if is_speech_detected:
-                if not session_state['is_speech']:
-                    # Speech started
-                    session_state['is_speech'] = True
-                    session_state['speech_start_time'] = current_timestamp
-                    speech_start = current_timestamp
-                    session_state_str = "speech_started"
-                    logger.debug(f"Speech started for session {session_id}")
+            # One chunk at a time per session: the recurrent state and the speech FSM are
+            # read-modify-write, and concurrent chunks (e.g. in one batch) would race on them
+            async with session_state['lock']:
+                current_timestamp = time.time()
                 
-                session_state['last_speech_time'] = current_timestamp
-                session_state_str = "speech_active"
-            
-            else:
-                if session_state['is_speech']:
-                    # Check if silence duration is enough to end speech
-                    silence_duration_ms = (current_timestamp - session_state['last_speech_time']) * 1000
+                assert audio_tensor.dim() == 1, "detect_speech expects a 1-D chunk"
+                
+                # Get VAD prediction
+                if self.batcher is not None:
+                    speech_prob = await self.batcher.infer(audio_tensor, config.sample_rate, session_state)
+                elif isinstance(self.model, StatefulVADModel):
+                    probs, session_state['model_state'] = self.model.run(
+                        audio_tensor.reshape(1, -1), config.sample_rate, session_state['model_state'])
+                    speech_prob = float(probs[0, 0])
+                else:
+                    with torch.inference_mode():
+                        # The TorchScript model holds a single state, so start fresh when another session used it last
+                        if self._state_owner != session_id and hasattr(self.model, "reset_states"):
+                            self.model.reset_states()
+                        self._state_owner = session_id
+                        speech_prob = self.model(audio_tensor, config.sample_rate).item()
+                
+                # Update speech state
+                is_speech_detected = speech_prob > config.threshold
+                speech_start = None
+                speech_end = None
+                speech_duration = None
+                session_state_str = "listening"
+                
+                if is_speech_detected:
+                    if not session_state['is_speech']:
+                        # Speech started
+                        session_state['is_speech'] = True
+                        session_state['speech_start_time'] = current_timestamp
+                        speech_start = current_timestamp
+                        session_state_str = "speech_started"
+                        logger.debug(f"Speech started for session {session_id}")
+                
+                    session_state['last_speech_time'] = current_timestamp
+                    session_state_str = "speech_active"
+                
+                else:
+                    if session_state['is_speech']:
+                        # Check if silence duration is enough to end speech
+                        silence_duration_ms = (current_timestamp - session_state['last_speech_time']) * 1000
                     
-                    if silence_duration_ms > config.min_silence_duration:
-                        # Speech ended
-                        speech_duration = (current_timestamp - session_state['speech_start_time']) * 1000
+                        if silence_duration_ms > config.min_silence_duration:
+                            # Speech ended
+                            speech_duration = (current_timestamp - session_state['speech_start_time']) * 1000
                         
-                        if speech_duration > config.min_speech_duration:
-                            speech_end = current_timestamp
-                            session_state['speech_segments'].append({
-                                'start': session_state['speech_start_time'],
-                                'end': current_timestamp,
-                                'duration': speech_duration
-                            })
-                            session_state_str = "speech_ended"
-                            logger.info(f"Speech ended for session {session_id}: {speech_duration:.0f}ms")
+                            if speech_duration > config.min_speech_duration:
+                                speech_end = current_timestamp
+                                session_state['speech_segments'].append({
+                                    'start': session_state['speech_start_time'],
+                                    'end': current_timestamp,
+                                    'duration': speech_duration
+                                })
+                                session_state_str = "speech_ended"
+                                logger.info(f"Speech ended for session {session_id}: {speech_duration:.0f}ms")
                         
-                        session_state['is_speech'] = False
-                        session_state['speech_start_time'] = None
+                            session_state['is_speech'] = False
+                            session_state['speech_start_time'] = None
+                        else:
+                            session_state_str = "speech_paused"
                     else:
-                        session_state_str = "speech_paused"
-                else:
-                    session_state_str = "silence"
+                        session_state_str = "silence"
             
             # Update metrics
             processing_time = (time.time() - start_time) * 1000
             self.total_requests += 1
             self.total_processing_time += processing_time
             
-            return VADResponse(
-                is_speech=is_speech_detected,
-                speech_probability=speech_prob,
-                speech_start=speech_start,
-                speech_end=speech_end,
-                speech_duration=speech_duration,
-                session_state=session_state_str,
-                processing_time_ms=processing_time
-            )
+            # Plain dict: the hot endpoints serialize it directly instead of validating a VADResponse
+            return {
+                "is_speech": is_speech_detected,
+                "speech_probability": speech_prob,
+                "speech_start": speech_start,
+                "speech_end": speech_end,
+                "speech_duration": speech_duration,
+                "session_state": session_state_str,
+                "processing_time_ms": processing_time
+            }
             
         except Exception as e:
             logger.error(f"VAD processing error for session {session_id}: {e}")
@@ -231,6 +732,10 @@ async def startup_event():
     """Initialize service on startup"""
     logger.info("🚀 Starting Silero VAD Service...")
     await vad_processor.load_model()
+    if VAD_BATCHING:
+        vad_processor.batcher = VADBatcher(vad_processor)
+        vad_processor.batcher.start()
+        logger.info(f"VAD batching enabled (max {VAD_BATCH_MAX_SIZE}, {VAD_BATCH_WAIT_MS}ms window)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -269,11 +774,13 @@ async def detect_voice_activity(request: VADRequest):
     """Detect voice activity in audio data"""
     try:
         # Decode base64 audio data
-        import base64
-        audio_bytes = base64.b64decode(request.audio_data)
+        if len(request.audio_data) > BASE64_THREADPOOL_BYTES:
+            audio_bytes = await run_in_threadpool(base64.b64decode, request.audio_data)
+        else:
+            audio_bytes = base64.b64decode(request.audio_data)
         
-        # Convert bytes to numpy array (assuming 16-bit PCM)
-        audio_np = np.frombuffer(audio_bytes, dtype=np.int16)
+        # Convert bytes to a float tensor (assuming 16-bit PCM)
+        audio_tensor = pcm16_to_tensor(audio_bytes)
         
         # Use provided config or default
         config = request.config or vad_processor.config
@@ -281,36 +788,59 @@ async def detect_voice_activity(request: VADRequest):
         # Generate session ID if not provided
         session_id = request.session_id or f"session_{int(time.time() * 1000)}"
         
-        # Process audio
-        result = await vad_processor.detect_speech(audio_np, session_id, config)
+        # Process audio (response_model only documents the shape; the dict is serialized as is)
+        result = await vad_processor.detect_speech(audio_tensor, session_id, config)
         
-        return result
+        return FastJSONResponse(result)
         
     except Exception as e:
         logger.error(f"VAD detection error: {e}")
         raise HTTPException(status_code=500, detail=f"VAD detection failed: {str(e)}")
 
-@app.post("/vad/detect-file")
+@app.post("/vad/detect-raw", response_model=VADResponse)
+async def detect_voice_activity_raw(request: Request):
+    """Detect voice activity in a raw 16-bit PCM body (application/octet-stream).
+    
+    Recommended hot path for the EchoBot integration: no base64 or JSON on the audio.
+    Optional headers: X-Session-Id, X-Sample-Rate, X-Threshold.
+    """
+    try:
+        audio_bytes = await request.body()
+        
+        # Header overrides on top of the current config
+        overrides = {}
+        if "x-sample-rate" in request.headers:
+            overrides["sample_rate"] = int(request.headers["x-sample-rate"])
+        if "x-threshold" in request.headers:
+            overrides["threshold"] = float(request.headers["x-threshold"])
+        config = VADConfig(**{**vad_processor.config.model_dump(), **overrides}) if overrides else vad_processor.config
+        
+        session_id = request.headers.get("x-session-id") or f"session_{int(time.time() * 1000)}"
+        
+        return FastJSONResponse(await vad_processor.detect_speech(pcm16_to_tensor(audio_bytes), session_id, config))
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid raw VAD request: {str(e)}")
+    except Exception as e:
+        logger.error(f"Raw VAD detection error: {e}")
+        raise HTTPException(status_code=500, detail=f"VAD detection failed: {str(e)}")
+
+@app.post("/vad/detect-file", response_model=VADFileResponse)
 async def detect_voice_activity_file(
     file: UploadFile = File(...),
     session_id: Optional[str] = None,
     threshold: float = 0.5
 ):
-    """Detect voice activity from uploaded audio file"""
+    """Detect all speech segments in an uploaded audio file"""
+    start_time = time.time()
     try:
         # Read file content
         content = await file.read()
         
-        # Handle WAV files
-        if file.filename.lower().endswith('.wav'):
-            with wave.open(io.BytesIO(content), 'rb') as wav_file:
-                sample_rate = wav_file.getframerate()
-                frames = wav_file.readframes(-1)
-                audio_np = np.frombuffer(frames, dtype=np.int16)
-        else:
-            # Assume raw PCM data
-            audio_np = np.frombuffer(content, dtype=np.int16)
-            sample_rate = 16000
+        # Decode WAV (or assume raw PCM) off the event loop; large files would stall other requests
+        audio_tensor, sample_rate = await run_in_threadpool(decode_audio_file, content, file.filename or "")
         
         # Create config
         config = VADConfig(
@@ -321,11 +851,24 @@ async def detect_voice_activity_file(
         # Generate session ID if not provided
         session_id = session_id or f"file_session_{int(time.time() * 1000)}"
         
-        # Process audio
-        result = await vad_processor.detect_speech(audio_np, session_id, config)
+        # Scan the whole file in one call instead of one request per chunk
+        segments = await vad_processor.speech_timestamps(audio_tensor, config)
         
-        return result
+        samples_per_ms = sample_rate / 1000
+        return VADFileResponse(
+            session_id=session_id,
+            sample_rate=sample_rate,
+            audio_duration_ms=len(audio_tensor) / samples_per_ms,
+            speech_segments=[
+                SpeechSegment(start=seg['start'], end=seg['end'],
+                              start_ms=seg['start'] / samples_per_ms, end_ms=seg['end'] / samples_per_ms)
+                for seg in segments
+            ],
+            processing_time_ms=(time.time() - start_time) * 1000
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"File VAD detection error: {e}")
         raise HTTPException(status_code=500, detail=f"File VAD detection failed: {str(e)}")
@@ -382,25 +925,15 @@ async def cleanup_sessions(max_age_hours: float = 2.0):
         "remaining_sessions": final_count
     }
 
-# Background task for periodic cleanup
-@app.on_event("startup")
-async def start_background_tasks():
-    """Start background cleanup task"""
-    async def periodic_cleanup():
-        while True:
-            try:
-                await asyncio.sleep(3600)  # Run every hour
-                vad_processor.cleanup_old_sessions()
-            except Exception as e:
-                logger.error(f"Background cleanup error: {e}")
-    
-    asyncio.create_task(periodic_cleanup())
-
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        app, 
-        host="0.0.0.0", 
-        port=8001,  # Different port from main survey API
-        reload=True
-    )
\ No newline at end of file
+    if os.environ.get("DEV_RELOAD"):
+        uvicorn.run("silero_vad_service:app", host="0.0.0.0", port=8001, reload=True)
+    else:
+        # Per-session VAD state is held in the worker, so WEB_CONCURRENCY > 1 needs session-sticky routing
+        uvicorn.run(
+            "silero_vad_service:app", 
+            host="0.0.0.0", 
+            port=8001,  # Different port from main survey API
+            workers=int(os.environ.get("WEB_CONCURRENCY", "1"))
+        )
\ No newline at end of file
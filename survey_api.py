@@ -5,15 +5,74 @@ from typing import Dict, Any, Optional, List
 import json
 from datetime import datetime
 import os
+import sys
+import asyncio
+import copy
+import gc
+from collections import OrderedDict
+
+try:
+    import orjson  # Optional: faster serialization of responses and stored sessions
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    from fastapi.responses import JSONResponse as FastJSONResponse
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+try:
+    import redis.asyncio as aioredis  # Optional: shared session store when REDIS_URL is set
+except ImportError:
+    aioredis = None
 
 # Import your existing SurveyAgent class
 from ConvSuveyAgentLatest_WorkingCopy import SurveyAgent
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, messages_from_dict, messages_to_dict
+
+app = FastAPI(title="Survey Agent API", description="LLM-powered conversational survey API for Teams bot integration",
+              default_response_class=FastJSONResponse)
+
+# Session storage. With REDIS_URL set, sessions live in Redis (shared by all workers and
+# replicas, surviving restarts) and active_sessions is a per-worker LRU of hot sessions;
+# otherwise active_sessions is the store itself.
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL_S = int(os.getenv("SESSION_TTL_S", "7200"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+redis_client = None  # Connected on startup
+active_sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+GC_THRESHOLD = os.getenv("GC_THRESHOLD", "")  # Optional "gen0,gen1,gen2" for gc.set_threshold
+
+# Upper bound on the blocking LLM work in one process-input turn
+PROCESS_TIMEOUT_S = 25
 
-app = FastAPI(title="Survey Agent API", description="LLM-powered conversational survey API for Teams bot integration")
+# First-turn LLM response per prompt inputs: the opening prompt has no history or user input,
+# so every session with the same context gets the same greeting. Small LRU, since each completed
+# survey changes previous_initiatives_context and makes the older keys dead.
+GREETING_CACHE_SIZE = 8
+_INITIAL_GREETING_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+
+# Set when a completed survey adds an initiative; the shared agent's previous-initiatives
+# context is reloaded (off the event loop) before the next session starts
+_previous_initiatives_stale = False
+_refresh_lock = asyncio.Lock()
+
+# The reply the user hears follows the last of these markers in the LLM output
+ANSWER_MARKER = "Answer:"
+
+
+def _last_question(text: str, breaks: str) -> Optional[str]:
+    """Text from the last break before text's last '?' up to and including it; None without a '?'.
+    
+    Scans back from the end instead of splitting, so long thought chains aren't copied into lists.
+    """
+    q = text.rfind("?")
+    if q == -1:
+        return None
+    start = max(text.rfind(b, 0, q) for b in breaks) + 1
+    return text[start:q + 1].strip() or None
 
-# Global session storage (in production, use Redis or database)
-active_sessions: Dict[str, Dict[str, Any]] = {}
 
 # Pydantic models for API requests/responses
 class StartSurveyRequest(BaseModel):
@@ -47,13 +106,45 @@ class SurveySession:
     def __init__(self, session_id: str, user_id: str = None):
         self.session_id = session_id
         self.user_id = user_id
-        self.agent = SurveyAgent()
+        # Per-session view of the shared agent (only collected data and transcript are per session)
+        self.agent = SurveyAgent.get_shared().for_session()
         self.messages = []
+        self._last_ai_content = ""  # Content of the latest AIMessage in self.messages
         self.created_at = datetime.now()
         self.is_first_turn = True
         self.current_status = "active"  # active, completed, error
+        self.version = 0  # Bumped on every save, so cached copies can be checked against Redis
+        self._pending_work: Optional[asyncio.Future] = None  # Worker-thread call still running after a timeout
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable session state"""
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "messages": messages_to_dict(self.messages),
+            "last_ai_content": self._last_ai_content,
+            "created_at": self.created_at.isoformat(),
+            "is_first_turn": self.is_first_turn,
+            "current_status": self.current_status,
+            "collected_data": self.agent.collected_data,
+            "version": self.version
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SurveySession":
+        """Rebuild a session saved with to_dict"""
+        session = cls(data["session_id"], data.get("user_id"))
+        session.messages = messages_from_dict(data["messages"])
+        session._last_ai_content = data.get("last_ai_content", "")
+        session.created_at = datetime.fromisoformat(data["created_at"])
+        session.is_first_turn = data["is_first_turn"]
+        session.current_status = sys.intern(data["current_status"])  # Share one object per status
+        # update() keeps the existing keys, so every session shares the agent's slot-name strings
+        session.agent.collected_data.update(data["collected_data"])
+        session.version = data["version"]
+        return session
         
-    def get_initial_greeting(self):
+    async def get_initial_greeting(self):
         """Get the initial greeting from the agent"""
         try:
             # Format the first prompt with empty history
@@ -69,14 +160,22 @@ class SurveySession:
                 previous_initiatives_context=self.agent.previous_initiatives_context
             )
             
-            response = self.agent.llm.invoke(first_prompt)
-            assistant_msg = response.content.strip()
-            
-            # Extract just the answer part (after "Answer:")
-            if "Answer:" in assistant_msg:
-                answer = assistant_msg.split("Answer:")[-1].strip()
+            cache_key = (self.agent.initial_context, self.agent.previous_initiatives_context,
+                         current_status, ", ".join(missing))
+            assistant_msg = _INITIAL_GREETING_CACHE.get(cache_key)
+            if assistant_msg is None:
+                # Blocking LLM call in a worker thread, as in process_user_input
+                response = await asyncio.to_thread(self.agent.llm.invoke, first_prompt)
+                assistant_msg = response.content.strip()
+                _INITIAL_GREETING_CACHE[cache_key] = assistant_msg
+                while len(_INITIAL_GREETING_CACHE) > GREETING_CACHE_SIZE:
+                    _INITIAL_GREETING_CACHE.popitem(last=False)
             else:
-                answer = assistant_msg
+                _INITIAL_GREETING_CACHE.move_to_end(cache_key)
+            
+            # Extract just the answer part (after the last "Answer:")
+            _, marker, answer_part = assistant_msg.rpartition(ANSWER_MARKER)
+            answer = answer_part.strip() if marker else assistant_msg
             
             # Quick fix: If we get a generic greeting, replace with proper survey greeting
             if answer.strip() in ["Hello! How can I assist you today?", "Hello! How can I assist you today with your AI initiatives?", "Hello! How can I help you today?"]:
@@ -85,6 +184,7 @@ class SurveySession:
             # Store the full response in messages for context
             self.messages.extend(first_prompt)
             self.messages.append(AIMessage(content=assistant_msg))
+            self._last_ai_content = assistant_msg
             
             self.is_first_turn = False
             return answer
@@ -92,17 +192,33 @@ class SurveySession:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error generating initial greeting: {str(e)}")
     
-    def process_user_input(self, user_input: str):
+    def _extract_fields(self, snippet: str) -> Dict[str, Any]:
+        """Run field extraction on a copy of the agent and return its collected data (worker thread)"""
+        working = copy.copy(self.agent)
+        working.collected_data = dict(self.agent.collected_data)
+        working.extract_all_fields_working_copy(snippet)
+        return working.collected_data
+    
+    async def process_user_input(self, user_input: str):
         """Process user input and return agent response"""
+        global _previous_initiatives_stale
+        # A thread from a timed-out turn can't be stopped; refuse new turns until it finishes
+        if self._pending_work is not None and not self._pending_work.done():
+            raise HTTPException(status_code=409, detail="Still processing your previous input - please try again shortly")
         try:
-            # Add timeout protection to prevent infinite processing
-            import signal
+            # Timeout protection: blocking LLM calls run in a worker thread under one shared deadline
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + PROCESS_TIMEOUT_S
             
-            def timeout_handler(signum, frame):
-                raise TimeoutError("Processing timed out after 25 seconds")
+            async def run_blocking(func, *args):
+                # Shielded, so on timeout the call keeps running as _pending_work
+                work = asyncio.ensure_future(asyncio.to_thread(func, *args))
+                work.add_done_callback(lambda f: f.cancelled() or f.exception())  # Don't log orphaned errors as unretrieved
+                self._pending_work = work
+                result = await asyncio.wait_for(asyncio.shield(work), timeout=max(deadline - loop.time(), 0))
+                self._pending_work = None
+                return result
             
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(25)  # 25 second timeout
             # Check for exit conditions
             if user_input.lower() in ("no", "n", "bye", "exit", "quit"):
                 self.current_status = "completed"
@@ -114,24 +230,23 @@ class SurveySession:
                 }
             
             # Get the last assistant message for extraction
-            last_assistant_msg = ""
-            for msg in reversed(self.messages):
-                if hasattr(msg, 'content') and hasattr(msg, 'type') and msg.type == "ai":
-                    last_assistant_msg = msg.content
-                    break
+            last_assistant_msg = self._last_ai_content
             
             # Extract fields from the conversation
             if last_assistant_msg:
                 conversation_snippet = f"Assistant: {last_assistant_msg}\nUser: {user_input}"
-                self.agent.extract_all_fields_working_copy(conversation_snippet)
+                # Extracted on a copy and committed only once the call returns within the deadline
+                self.agent.collected_data = await run_blocking(self._extract_fields, conversation_snippet)
             
             # Check if everything is collected
             missing = self.agent.get_missing_fields()
             if not missing:
                 # All fields collected
                 self.current_status = "completed"
-                # Update CSV with new initiative
-                self.agent.update_initiatives_csv(self.agent.collected_data.copy())
+                # Update CSV with new initiative (blob GET, rewrite and PUT - off the event loop);
+                # new sessions reload it before they start
+                await asyncio.to_thread(self.agent.update_initiatives_csv, self.agent.collected_data.copy())
+                _previous_initiatives_stale = True
                 return {
                     "message": "Thank you! I've collected all the information about your AI initiative.",
                     "status": "completed", 
@@ -152,43 +267,26 @@ class SurveySession:
                 previous_initiatives_context=self.agent.previous_initiatives_context
             )
             
-            response = self.agent.llm.invoke(next_prompt)
+            response = await run_blocking(self.agent.llm.invoke, next_prompt)
             assistant_msg = response.content.strip()
             
             # Extract just the answer part
-            if "Answer:" in assistant_msg:
-                answer = assistant_msg.split("Answer:")[-1].strip()
+            _, marker, answer_part = assistant_msg.rpartition(ANSWER_MARKER)
+            if marker:
+                answer = answer_part.strip()
             elif "Thought 5:" in assistant_msg:
                 # Fallback: extract the question from Thought 5 if no Answer section
-                thought5_section = assistant_msg.split("Thought 5:")[-1].strip()
-                # Look for a question at the end of Thought 5
-                if "?" in thought5_section:
-                    # Extract the last sentence that ends with a question mark
-                    sentences = thought5_section.split(".")
-                    for sentence in reversed(sentences):
-                        if "?" in sentence:
-                            answer = sentence.strip()
-                            break
-                    else:
-                        answer = thought5_section
-                else:
-                    answer = thought5_section
+                thought5_section = assistant_msg.rpartition("Thought 5:")[2].strip()
+                # Use the last sentence that ends with a question mark, if any
+                answer = _last_question(thought5_section, ".") or thought5_section
             else:
                 # Find the last question in the response
-                if "?" in assistant_msg:
-                    lines = assistant_msg.split('\n')
-                    for line in reversed(lines):
-                        if "?" in line and line.strip():
-                            answer = line.strip()
-                            break
-                    else:
-                        answer = assistant_msg
-                else:
-                    answer = assistant_msg
+                answer = _last_question(assistant_msg, "\n") or assistant_msg
             
             # Update message history
             self.messages.append(HumanMessage(content=user_input))
             self.messages.append(AIMessage(content=assistant_msg))
+            self._last_ai_content = assistant_msg
             
             result = {
                 "message": answer,
@@ -196,22 +294,123 @@ class SurveySession:
                 "collected_data": self.agent.collected_data,
                 "missing_fields": missing
             }
-            
-            # Clear the timeout
-            signal.alarm(0)
             return result
             
-        except TimeoutError as e:
-            signal.alarm(0)  # Clear timeout
+        except asyncio.TimeoutError:
             self.current_status = "error"
             raise HTTPException(status_code=408, detail="Processing timed out - please try again")
         except Exception as e:
-            signal.alarm(0)  # Clear timeout
             self.current_status = "error"
             raise HTTPException(status_code=500, detail=f"Error processing user input: {str(e)}")
 
+async def refresh_stale_context():
+    """Reload the shared previous-initiatives context if a survey completed since the last load"""
+    global _previous_initiatives_stale
+    if not _previous_initiatives_stale:
+        return
+    async with _refresh_lock:
+        if _previous_initiatives_stale:
+            _previous_initiatives_stale = False
+            await asyncio.to_thread(SurveyAgent.get_shared().refresh_previous_initiatives)
+
+# Session store helpers
+
+def _session_key(session_id: str) -> str:
+    return f"survey_session:{session_id}"
+
+def _session_meta(session: SurveySession) -> Dict[str, Any]:
+    """The fields /sessions lists, stored beside each session so listing needn't load it"""
+    return {
+        "session_id": session.session_id,
+        "created_at": session.created_at.isoformat(),
+        "status": session.current_status
+    }
+
+def _cache_session(session: SurveySession):
+    active_sessions[session.session_id] = {
+        "session": session,
+        "created_at": session.created_at.isoformat()
+    }
+    active_sessions.move_to_end(session.session_id)
+    if redis_client is not None:
+        while len(active_sessions) > SESSION_CACHE_SIZE:
+            active_sessions.popitem(last=False)
+
+async def load_session(session_id: str) -> Optional[SurveySession]:
+    """Session by id, from the local cache when it is still the latest saved version"""
+    entry = active_sessions.get(session_id)
+    if redis_client is None:
+        return entry["session"] if entry else None
+    
+    version = await redis_client.get(_session_key(session_id) + ":version")
+    if version is None:
+        active_sessions.pop(session_id, None)
+        return None
+    if entry and entry["session"].version == int(version):
+        active_sessions.move_to_end(session_id)
+        return entry["session"]
+    
+    # Not cached here, or another worker has saved a newer version
+    data = await redis_client.get(_session_key(session_id))
+    if data is None:
+        return None
+    session = SurveySession.from_dict(_json_loads(data))
+    _cache_session(session)
+    return session
+
+async def save_session(session: SurveySession):
+    """Store the session locally and, when configured, in Redis"""
+    session.version += 1
+    _cache_session(session)
+    if redis_client is not None:
+        key = _session_key(session.session_id)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(key, _json_dumps(session.to_dict()), ex=SESSION_TTL_S)
+            pipe.set(key + ":version", session.version, ex=SESSION_TTL_S)
+            pipe.set(key + ":meta", _json_dumps(_session_meta(session)), ex=SESSION_TTL_S)
+            await pipe.execute()
+
+async def drop_session(session_id: str):
+    active_sessions.pop(session_id, None)
+    if redis_client is not None:
+        key = _session_key(session_id)
+        await redis_client.delete(key, key + ":version", key + ":meta")
+
 # API Endpoints
 
+@app.on_event("startup")
+async def connect_session_store():
+    """Connect to Redis when REDIS_URL is configured"""
+    global redis_client
+    if not REDIS_URL:
+        return
+    if aioredis is None:
+        print("REDIS_URL is set but the redis package is not installed - using in-memory sessions")
+        return
+    try:
+        client = aioredis.from_url(REDIS_URL, decode_responses=True)
+        await client.ping()
+        redis_client = client
+        print("Using Redis session store")
+    except Exception as e:
+        print(f"Error connecting to Redis, using in-memory sessions: {e}")
+
+@app.on_event("startup")
+async def load_shared_agent():
+    """Load the shared agent (LLM client, prompts, CSV context) before the first session"""
+    try:
+        await asyncio.to_thread(SurveyAgent.get_shared)
+    except Exception as e:
+        print(f"Error loading survey agent at startup: {e}")
+
+@app.on_event("startup")
+def freeze_startup_heap():
+    """Move everything loaded at startup (modules, shared agent) out of the GC's scans; runs last"""
+    gc.collect()
+    gc.freeze()
+    if GC_THRESHOLD:
+        gc.set_threshold(*(int(n) for n in GC_THRESHOLD.split(",")))
+
 @app.get("/")
 async def root():
     return {"message": "Survey Agent API is running", "version": "1.0.0"}
@@ -225,22 +424,20 @@ async def start_survey(request: StartSurveyRequest):
     """Start a new survey session"""
     try:
         session_id = str(uuid.uuid4())
+        await refresh_stale_context()
         session = SurveySession(session_id, request.user_id)
         
         # Get initial greeting
-        initial_message = session.get_initial_greeting()
+        initial_message = await session.get_initial_greeting()
         
         # Store session
-        active_sessions[session_id] = {
-            "session": session,
-            "created_at": datetime.now().isoformat()
-        }
+        await save_session(session)
         
-        return StartSurveyResponse(
-            session_id=session_id,
-            message=initial_message,
-            status="active"
-        )
+        return FastJSONResponse({
+            "session_id": session_id,
+            "message": initial_message,
+            "status": "active"
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting survey: {str(e)}")
@@ -249,28 +446,34 @@ async def start_survey(request: StartSurveyRequest):
 async def process_input(request: ProcessInputRequest):
     """Process user input for an existing session"""
     try:
-        if request.session_id not in active_sessions:
+        session = await load_session(request.session_id)
+        if session is None:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        session = active_sessions[request.session_id]["session"]
-        
         if session.current_status == "completed":
             raise HTTPException(status_code=400, detail="Session already completed")
         
         # Process the input
-        result = session.process_user_input(request.user_input)
+        try:
+            result = await session.process_user_input(request.user_input)
+        except HTTPException:
+            await save_session(session)  # Keep the error status and any fields already extracted
+            raise
         
         # Clean up completed sessions
         if result["status"] == "completed":
-            del active_sessions[request.session_id]
+            await drop_session(request.session_id)
+        else:
+            await save_session(session)
         
-        return ProcessInputResponse(
-            session_id=request.session_id,
-            message=result["message"],
-            status=result["status"],
-            collected_data=result.get("collected_data"),
-            missing_fields=result.get("missing_fields")
-        )
+        # Serialized directly (ProcessInputResponse still documents the shape)
+        return FastJSONResponse({
+            "session_id": request.session_id,
+            "message": result["message"],
+            "status": result["status"],
+            "collected_data": result.get("collected_data"),
+            "missing_fields": result.get("missing_fields")
+        })
         
     except HTTPException:
         raise
@@ -280,42 +483,47 @@ async def process_input(request: ProcessInputRequest):
 @app.get("/session/{session_id}/status", response_model=SessionStatusResponse)
 async def get_session_status(session_id: str):
     """Get the current status of a session"""
-    if session_id not in active_sessions:
+    session = await load_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = active_sessions[session_id]["session"]
-    
-    return SessionStatusResponse(
-        session_id=session_id,
-        status=session.current_status,
-        collected_data=session.agent.collected_data,
-        missing_fields=session.agent.get_missing_fields()
-    )
+    return FastJSONResponse({
+        "session_id": session_id,
+        "status": session.current_status,
+        "collected_data": session.agent.collected_data,
+        "missing_fields": session.agent.get_missing_fields()
+    })
 
 @app.delete("/session/{session_id}")
 async def end_session(session_id: str):
     """End a session and clean up resources"""
-    if session_id not in active_sessions:
+    if await load_session(session_id) is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del active_sessions[session_id]
+    await drop_session(session_id)
     return {"message": "Session ended successfully"}
 
 @app.get("/sessions")
 async def list_active_sessions():
     """List all active sessions (for debugging)"""
+    if redis_client is not None:
+        # One MGET of the small meta values; sessions aren't loaded or pulled into the local cache
+        keys = [key async for key in redis_client.scan_iter(match=_session_key("*") + ":meta")]
+        values = await redis_client.mget(keys) if keys else []
+        sessions = [_json_loads(value) for value in values if value is not None]
+    else:
+        sessions = [_session_meta(data["session"]) for data in active_sessions.values()]
+    
     return {
-        "active_sessions": len(active_sessions),
-        "sessions": [
-            {
-                "session_id": sid,
-                "created_at": data["created_at"],
-                "status": data["session"].current_status
-            }
-            for sid, data in active_sessions.items()
-        ]
+        "active_sessions": len(sessions),
+        "sessions": sessions
     }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.getenv("DEV_RELOAD"):
+        uvicorn.run("survey_api:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        # Multiple workers need sessions out of process (REDIS_URL); in-memory sessions need one worker
+        workers = int(os.getenv("WEB_CONCURRENCY", "4" if REDIS_URL else "1"))
+        uvicorn.run("survey_api:app", host="0.0.0.0", port=8000, workers=workers)
\ No newline at end of file
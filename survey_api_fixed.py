@@ -6,16 +6,138 @@ import json
 from datetime import datetime, timedelta
 import os
 import asyncio
+import gc
+import logging
+import logging.handlers
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
+try:
+    import orjson  # Optional: faster response serialization
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as FastJSONResponse
+
 # Import the fixed SurveyAgent
-from ConvSurveyAgent_Fixed import ConversationSession
+from ConvSurveyAgent_Fixed import ConversationSession, get_shared_config
+from conversation_logger import log_conversation_event, save_conversation
+
+logger = logging.getLogger("survey_api")
+
+# Records are formatted and written on the QueueListener thread, so handlers never block on stderr
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_listener: Optional[logging.handlers.QueueListener] = None
 
-app = FastAPI(title="Survey Agent API", description="LLM-powered conversational survey API for Teams bot integration")
+app = FastAPI(title="Survey Agent API", description="LLM-powered conversational survey API for Teams bot integration",
+              default_response_class=FastJSONResponse)
 
 # Global session storage with proper cleanup
 active_sessions: Dict[str, ConversationSession] = {}
 
+SESSION_TIMEOUT_HOURS = 2
+
+GC_THRESHOLD = os.getenv("GC_THRESHOLD", "")  # Optional "gen0,gen1,gen2" for gc.set_threshold
+
+# One expiry timer per session on the event loop. Turns don't touch it: when it fires for a
+# session that was active since, it is re-armed for the remaining time.
+_expiry_handles: Dict[str, asyncio.TimerHandle] = {}
+
+# At most INFLIGHT_MAX turns run the agent at once; later turns queue for a slot, and once
+# INFLIGHT_QUEUE_MAX are queued new turns get 429 so the client retries instead of timing out
+INFLIGHT_MAX = int(os.getenv("INFLIGHT_MAX", "64"))
+INFLIGHT_QUEUE_MAX = int(os.getenv("INFLIGHT_QUEUE_MAX", "256"))
+_inflight = asyncio.BoundedSemaphore(INFLIGHT_MAX)
+_inflight_waiting = 0
+
+# Conversation-log uploads for ended sessions run here, off the request path
+_flush_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="survey-io")
+
+
+@asynccontextmanager
+async def _inflight_slot():
+    """Hold one of the INFLIGHT_MAX turn slots; raises 429 if too many turns are already queued."""
+    global _inflight_waiting
+    if _inflight.locked():
+        if _inflight_waiting >= INFLIGHT_QUEUE_MAX:
+            raise HTTPException(status_code=429, detail="Too many requests in progress",
+                                headers={"Retry-After": "1"})
+        waited_from = time.monotonic()
+        _inflight_waiting += 1
+        try:
+            await _inflight.acquire()
+        finally:
+            _inflight_waiting -= 1
+        waited_s = time.monotonic() - waited_from
+        if waited_s > 1:
+            logger.info("Turn waited %.1fs for an inflight slot", waited_s)
+    else:
+        await _inflight.acquire()
+    try:
+        yield
+    finally:
+        _inflight.release()
+
+
+def _flush_session(session_id: str, user_id: Optional[str], final_status: str, collected_data: Dict[str, Any]):
+    """Log the manual termination and save the conversation log (runs on _flush_pool)."""
+    try:
+        # Log manual session termination
+        log_conversation_event(session_id, "session_manually_ended", {
+            "termination_reason": "manual_deletion",
+            "final_status": final_status,
+            "collected_data": collected_data
+        })
+        
+        # Save the complete conversation log
+        logger.info("Saving conversation log for manually ended session %s", session_id)
+        save_conversation(session_id, user_id)
+        logger.info("Conversation log saved for manually ended session %s", session_id)
+        
+    except Exception as e:
+        logger.error("Failed to save conversation log for manually ended session %s: %s", session_id, e)
+
+
+def _schedule_expiry(session_id: str, session: ConversationSession):
+    """Arm the session's expiry timer for the end of its idle timeout."""
+    deadline = session.last_activity + timedelta(hours=SESSION_TIMEOUT_HOURS)
+    delay = max((deadline - datetime.now()).total_seconds(), 0)
+    _expiry_handles[session_id] = asyncio.get_running_loop().call_later(delay, _expire_session, session_id)
+
+
+def _cancel_expiry(session_id: str):
+    handle = _expiry_handles.pop(session_id, None)
+    if handle is not None:
+        handle.cancel()
+
+
+def _expire_session(session_id: str) -> bool:
+    """Remove the session if it has been idle for the timeout, else re-arm its timer; True if removed."""
+    session = active_sessions.get(session_id)
+    if session is None:
+        _expiry_handles.pop(session_id, None)
+        return False
+    if not session.is_expired(timeout_hours=SESSION_TIMEOUT_HOURS):
+        _schedule_expiry(session_id, session)  # Active since the timer was armed
+        return False
+    
+    # Save CSV data before cleanup if session has collected data (queued to the background uploader)
+    try:
+        if hasattr(session, 'agent') and session.agent.collected_data:
+            collected_fields = sum(1 for v in session.agent.collected_data.values() if v)
+            if collected_fields > 0:
+                logger.info("Saving CSV data for expired session %s (%d fields collected)", session_id, collected_fields)
+                session.agent.update_initiatives_csv(session.agent.collected_data.copy())
+                logger.info("CSV data saved for expired session %s", session_id)
+    except Exception as e:
+        logger.error("Failed to save CSV data for expired session %s: %s", session_id, e)
+    
+    _cancel_expiry(session_id)
+    del active_sessions[session_id]
+    logger.info("Cleaned up expired session: %s", session_id)
+    return True
+
 # Pydantic models for API requests/responses
 class StartSurveyRequest(BaseModel):
     user_id: Optional[str] = None
@@ -44,67 +166,47 @@ class SessionStatusResponse(BaseModel):
     missing_fields: List[str]
 
 
-# Background task for session cleanup
-async def cleanup_expired_sessions():
-    """Clean up expired sessions periodically."""
-    while True:
-        try:
-            current_time = datetime.now()
-            expired_sessions = []
-            
-            for session_id, session in active_sessions.items():
-                if session.is_expired(timeout_hours=2):  # 2 hour timeout
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                session = active_sessions[session_id]
-                
-                # Save CSV data before cleanup if session has collected data
-                try:
-                    if hasattr(session, 'agent') and session.agent.collected_data:
-                        collected_fields = sum(1 for v in session.agent.collected_data.values() if v)
-                        if collected_fields > 0:
-                            print(f"Saving CSV data for expired session {session_id} ({collected_fields} fields collected)")
-                            session.agent.update_initiatives_csv(session.agent.collected_data.copy())
-                            print(f"CSV data saved for expired session {session_id}")
-                except Exception as e:
-                    print(f"Failed to save CSV data for expired session {session_id}: {e}")
-                
-                del active_sessions[session_id]
-                print(f"Cleaned up expired session: {session_id}")
-            
-            if expired_sessions:
-                print(f"Cleaned up {len(expired_sessions)} expired sessions")
-                
-        except Exception as e:
-            print(f"Error in session cleanup: {e}")
-        
-        # Run cleanup every 30 minutes
-        await asyncio.sleep(1800)
+@app.on_event("startup")
+def start_log_listener():
+    """Route this module's logs through the background QueueListener."""
+    global _log_listener
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    _log_listener = logging.handlers.QueueListener(_log_queue, handler)
+    _log_listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False  # Root/uvicorn handlers would write the record again, inline
 
 
-# Lifespan context manager for background tasks
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Start background tasks
-    cleanup_task = asyncio.create_task(cleanup_expired_sessions())
-    
-    yield
-    
-    # Clean up on shutdown
-    cleanup_task.cancel()
+@app.on_event("startup")
+async def load_shared_config():
+    """Load the shared agent config (LLM client, prompts, CSV data) before the first session."""
     try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        pass
+        await asyncio.to_thread(get_shared_config)
+    except Exception as e:
+        logger.error("Error loading survey agent config at startup: %s", e)
 
 
-# Update FastAPI app with lifespan
-app = FastAPI(
-    title="Survey Agent API",
-    description="LLM-powered conversational survey API for Teams bot integration",
-    lifespan=lifespan
-)
+@app.on_event("startup")
+def freeze_startup_heap():
+    """Move everything loaded so far (modules, shared config) out of the GC's scans.
+    
+    Registered last so it runs after the other startup hooks. GC_THRESHOLD
+    (e.g. "50000,20,20") optionally makes collections rarer.
+    """
+    gc.collect()
+    gc.freeze()
+    if GC_THRESHOLD:
+        gc.set_threshold(*(int(n) for n in GC_THRESHOLD.split(",")))
+    logger.info("Froze %d startup objects; GC thresholds %s", gc.get_freeze_count(), gc.get_threshold())
+
+
+@app.on_event("shutdown")
+def stop_log_listener():
+    """Flush queued log records on shutdown."""
+    if _log_listener is not None:
+        _log_listener.stop()
 
 
 # API Endpoints
@@ -118,7 +220,8 @@ async def health_check():
     return {
         "status": "healthy", 
         "timestamp": datetime.now().isoformat(),
-        "active_sessions": len(active_sessions)
+        "active_sessions": len(active_sessions),
+        "queued_turns": _inflight_waiting
     }
 
 
@@ -132,21 +235,22 @@ async def start_survey(request: StartSurveyRequest):
         session = ConversationSession(session_id, request.user_id)
         
         # Get initial greeting
-        initial_message = session.get_initial_greeting()
+        initial_message = await session.aget_initial_greeting()
         
         # Store session
         active_sessions[session_id] = session
+        _schedule_expiry(session_id, session)
         
-        print(f"Created new session {session_id} for user {request.user_id}")
+        logger.info("Created new session %s for user %s", session_id, request.user_id)
         
-        return StartSurveyResponse(
-            session_id=session_id,
-            message=initial_message,
-            status="active"
-        )
+        return FastJSONResponse({
+            "session_id": session_id,
+            "message": initial_message,
+            "status": "active"
+        })
         
     except Exception as e:
-        print(f"Error starting survey: {e}")
+        logger.error("Error starting survey: %s", e)
         raise HTTPException(status_code=500, detail=f"Error starting survey: {str(e)}")
 
 
@@ -160,44 +264,49 @@ async def process_input(request: ProcessInputRequest):
         
         session = active_sessions[request.session_id]
         
-        # Check if session is still active
-        if session.status == "completed":
-            raise HTTPException(status_code=400, detail="Session already completed")
-        
-        if session.status == "error":
-            raise HTTPException(status_code=400, detail="Session is in error state")
-        
-        # Allow continued conversation in follow_up mode
-        # session.status can be "active" or "follow_up" - both allow processing
-        
-        # Process the input with timeout protection
-        try:
-            result = await asyncio.wait_for(
-                asyncio.to_thread(session.process_input, request.user_input),
-                timeout=90.0  # 90 second timeout to match LLMService.cs
-            )
-        except asyncio.TimeoutError:
-            session.status = "error"
-            raise HTTPException(status_code=408, detail="Processing timed out")
+        # One turn at a time per session; other sessions are unaffected
+        async with session.turn_lock:
+            # Check if session is still active (a turn that held the lock may have just ended it)
+            if session.status == "completed":
+                raise HTTPException(status_code=400, detail="Session already completed")
+            
+            if session.status == "error":
+                raise HTTPException(status_code=400, detail="Session is in error state")
+            
+            # Allow continued conversation in follow_up mode
+            # session.status can be "active" or "follow_up" - both allow processing
+            
+            # Process the input with timeout protection
+            try:
+                async with _inflight_slot():
+                    result = await asyncio.wait_for(
+                        session.process_input_async(request.user_input),
+                        timeout=90.0  # 90 second timeout to match LLMService.cs
+                    )
+            except asyncio.TimeoutError:
+                # The turn was cancelled part-way; its state can't be trusted
+                session.status = "error"
+                raise HTTPException(status_code=408, detail="Processing timed out")
         
         # Handle session completion - DON'T auto-delete
         if result["status"] == "completed":
-            print(f"Session {request.session_id} completed successfully")
+            logger.info("Session %s completed successfully", request.session_id)
             # Keep session for a while in case client needs to access final data
             # It will be cleaned up by the background task later
         
-        return ProcessInputResponse(
-            session_id=request.session_id,
-            message=result["message"],
-            status=result["status"],
-            collected_data=result.get("collected_data"),
-            missing_fields=result.get("missing_fields")
-        )
+        # Serialized directly (ProcessInputResponse still documents the shape)
+        return FastJSONResponse({
+            "session_id": request.session_id,
+            "message": result["message"],
+            "status": result["status"],
+            "collected_data": result.get("collected_data"),
+            "missing_fields": result.get("missing_fields")
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error processing input for session {request.session_id}: {e}")
+        logger.error("Error processing input for session %s: %s", request.session_id, e)
         
         # Try to update session status if it exists
         if request.session_id in active_sessions:
@@ -215,12 +324,12 @@ async def get_session_status(session_id: str):
     session = active_sessions[session_id]
     status_data = session.get_status()
     
-    return SessionStatusResponse(
-        session_id=session_id,
-        status=status_data["status"],
-        collected_data=status_data["collected_data"],
-        missing_fields=status_data["missing_fields"]
-    )
+    return FastJSONResponse({
+        "session_id": session_id,
+        "status": status_data["status"],
+        "collected_data": status_data["collected_data"],
+        "missing_fields": status_data["missing_fields"]
+    })
 
 
 @app.delete("/session/{session_id}")
@@ -239,34 +348,19 @@ async def end_session(session_id: str):
         if hasattr(session, 'agent') and session.agent.collected_data:
             collected_fields = sum(1 for v in session.agent.collected_data.values() if v)
             if collected_fields > 0:
-                print(f"Saving CSV data for manually ended session {session_id} ({collected_fields} fields collected)")
+                logger.info("Saving CSV data for manually ended session %s (%d fields collected)", session_id, collected_fields)
                 session.agent.update_initiatives_csv(session.agent.collected_data.copy())
-                print(f"CSV data saved for manually ended session {session_id}")
-    except Exception as e:
-        print(f"Failed to save CSV data for manually ended session {session_id}: {e}")
-    
-    try:
-        from conversation_logger import log_conversation_event, save_conversation
-        
-        # Log manual session termination
-        log_conversation_event(session_id, "session_manually_ended", {
-            "termination_reason": "manual_deletion",
-            "final_status": session.status,
-            "collected_data": session.agent.collected_data
-        })
-        
-        # Save the complete conversation log
-        print(f"Saving conversation log for manually ended session {session_id}")
-        save_conversation(session_id, session.user_id)
-        print(f"Conversation log saved for manually ended session {session_id}")
-        
+                logger.info("CSV data saved for manually ended session %s", session_id)
     except Exception as e:
-        print(f"Failed to save conversation log for manually ended session {session_id}: {e}")
+        logger.error("Failed to save CSV data for manually ended session %s: %s", session_id, e)
     
-    # Delete session
+    # Delete session, then upload its conversation log in the background
+    _cancel_expiry(session_id)
     del active_sessions[session_id]
+    _flush_pool.submit(_flush_session, session_id, session.user_id, session.status,
+                       session.agent.collected_data.copy())
     
-    print(f"Manually ended session {session_id}")
+    logger.info("Manually ended session %s", session_id)
     
     return {
         "message": "Session ended successfully",
@@ -275,21 +369,24 @@ async def end_session(session_id: str):
 
 
 @app.get("/sessions")
-async def list_active_sessions():
-    """List all active sessions (for debugging and monitoring)."""
+async def list_active_sessions(verbose: bool = False):
+    """List all active sessions (for debugging and monitoring); verbose adds user and timestamps."""
     sessions_info = []
     
     for session_id, session in active_sessions.items():
-        status_data = session.get_status()
-        sessions_info.append({
+        # Read the fields directly; get_status() would copy collected_data and compute missing fields
+        collected_data = session.agent.collected_data
+        info = {
             "session_id": session_id,
-            "user_id": session.user_id,
-            "status": status_data["status"],
-            "created_at": status_data["created_at"],
-            "last_activity": status_data["last_activity"],
-            "fields_collected": len([v for v in status_data["collected_data"].values() if v]),
-            "total_fields": len(status_data["collected_data"])
-        })
+            "status": session.status,
+            "fields_collected": sum(1 for v in collected_data.values() if v),
+            "total_fields": len(collected_data)
+        }
+        if verbose:
+            info["user_id"] = session.user_id
+            info["created_at"] = session.created_at.isoformat()
+            info["last_activity"] = session.last_activity.isoformat()
+        sessions_info.append(info)
     
     return {
         "total_sessions": len(active_sessions),
@@ -300,16 +397,10 @@ async def list_active_sessions():
 @app.get("/sessions/cleanup")
 async def manual_cleanup():
     """Manually trigger session cleanup (for debugging)."""
-    expired_count = 0
-    expired_sessions = []
-    
-    for session_id, session in list(active_sessions.items()):
-        if session.is_expired(timeout_hours=2):
-            expired_sessions.append(session_id)
-    
-    for session_id in expired_sessions:
-        del active_sessions[session_id]
-        expired_count += 1
+    # Expire due sessions now rather than when their timers fire
+    expired_sessions = [session_id for session_id, session in list(active_sessions.items())
+                        if session.is_expired(timeout_hours=SESSION_TIMEOUT_HOURS)]
+    expired_count = sum(1 for session_id in expired_sessions if _expire_session(session_id))
     
     return {
         "message": f"Cleaned up {expired_count} expired sessions",
@@ -322,10 +413,15 @@ async def manual_cleanup():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unexpected errors."""
-    print(f"Unexpected error: {exc}")
-    return HTTPException(status_code=500, detail="Internal server error")
+    logger.exception("Unhandled error on %s", request.url.path, exc_info=exc)
+    return FastJSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.getenv("DEV_RELOAD"):
+        uvicorn.run("survey_api_fixed:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        # Sessions are held in this process, so only raise WEB_CONCURRENCY behind sticky routing
+        uvicorn.run("survey_api_fixed:app", host="0.0.0.0", port=8000,
+                    workers=int(os.getenv("WEB_CONCURRENCY", "1")))
\ No newline at end of file
@@ -4,19 +4,37 @@ Test script for Survey Agent FastAPI
 This script tests the API endpoints to ensure they work correctly
 """
 
+import asyncio
+import os
+import sys
 import requests
-import json
 import time
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
 HEADERS = {"Content-Type": "application/json"}
+TURN_DELAY_S = float(os.getenv("TURN_DELAY_S", "0.5"))  # Set to 0 when benchmarking
+
+# One keep-alive connection pool for every request instead of a new one per call
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+
+TEST_INPUTS = [
+    "Yes, we have a new AI initiative called 'Smart Customer Service'",
+    "It's a chatbot for customer support using natural language processing",
+    "We're currently in the planning stage",
+    "The budget is around $500,000",
+    "We want to reduce response time by 50% and improve customer satisfaction",
+    "This will be managed by the IT department",
+    "We're planning to use Python, TensorFlow, and Azure OpenAI",
+    "bye"  # End the conversation
+]
 
 def test_health_check():
     """Test the health check endpoint"""
     print("🔍 Testing health check endpoint...")
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
+        response = SESSION.get(f"{API_BASE_URL}/health")
         if response.status_code == 200:
             print("✅ Health check passed")
             print(f"   Response: {response.json()}")
@@ -36,9 +54,7 @@ def test_start_survey():
             "user_id": "test_user_123",
             "context": {"test": "data"}
         }
-        response = requests.post(f"{API_BASE_URL}/start-survey", 
-                               headers=HEADERS, 
-                               data=json.dumps(payload))
+        response = SESSION.post(f"{API_BASE_URL}/start-survey", json=payload)
         
         if response.status_code == 200:
             data = response.json()
@@ -62,9 +78,7 @@ def test_process_input(session_id, user_input):
             "session_id": session_id,
             "user_input": user_input
         }
-        response = requests.post(f"{API_BASE_URL}/process-input", 
-                               headers=HEADERS, 
-                               data=json.dumps(payload))
+        response = SESSION.post(f"{API_BASE_URL}/process-input", json=payload)
         
         if response.status_code == 200:
             data = response.json()
@@ -86,7 +100,7 @@ def test_session_status(session_id):
     """Test getting session status"""
     print(f"\n🔍 Testing session status...")
     try:
-        response = requests.get(f"{API_BASE_URL}/session/{session_id}/status")
+        response = SESSION.get(f"{API_BASE_URL}/session/{session_id}/status")
         
         if response.status_code == 200:
             data = response.json()
@@ -119,18 +133,7 @@ def test_full_conversation():
         return False
     
     # Test conversation with sample inputs
-    test_inputs = [
-        "Yes, we have a new AI initiative called 'Smart Customer Service'",
-        "It's a chatbot for customer support using natural language processing",
-        "We're currently in the planning stage",
-        "The budget is around $500,000",
-        "We want to reduce response time by 50% and improve customer satisfaction",
-        "This will be managed by the IT department",
-        "We're planning to use Python, TensorFlow, and Azure OpenAI",
-        "bye"  # End the conversation
-    ]
-    
-    for i, user_input in enumerate(test_inputs, 1):
+    for i, user_input in enumerate(TEST_INPUTS, 1):
         print(f"\n--- Turn {i} ---")
         result = test_process_input(session_id, user_input)
         
@@ -144,7 +147,8 @@ def test_full_conversation():
             break
             
         # Small delay between inputs
-        time.sleep(0.5)
+        if TURN_DELAY_S:
+            time.sleep(TURN_DELAY_S)
     
     print("\n✅ Full conversation test completed!")
     return True
@@ -153,7 +157,7 @@ def test_list_sessions():
     """Test listing active sessions"""
     print("\n🔍 Testing list sessions endpoint...")
     try:
-        response = requests.get(f"{API_BASE_URL}/sessions")
+        response = SESSION.get(f"{API_BASE_URL}/sessions")
         if response.status_code == 200:
             data = response.json()
             print("✅ List sessions passed")
@@ -199,5 +203,47 @@ def main():
         print("🔧 Check the server logs for details")
     print("="*60)
 
+async def run_conversation_async(client):
+    """Run one full conversation on a shared httpx.AsyncClient; returns per-turn latencies"""
+    response = await client.post("/start-survey", json={"user_id": "load_test"})
+    response.raise_for_status()
+    session_id = response.json()["session_id"]
+    
+    latencies = []
+    for user_input in TEST_INPUTS:
+        start = time.perf_counter()
+        response = await client.post("/process-input", json={"session_id": session_id, "user_input": user_input})
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        if response.json()["status"] == "completed":
+            break
+    return latencies
+
+async def load_test(num_sessions):
+    """Run num_sessions conversations concurrently and print turn latency stats"""
+    import httpx
+    
+    print(f"🚀 Load test: {num_sessions} concurrent conversations")
+    limits = httpx.Limits(max_connections=num_sessions, max_keepalive_connections=num_sessions)
+    async with httpx.AsyncClient(base_url=API_BASE_URL, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[run_conversation_async(client) for _ in range(num_sessions)],
+                                       return_exceptions=True)
+        elapsed = time.perf_counter() - start
+    
+    failures = [r for r in results if isinstance(r, BaseException)]
+    latencies = sorted(t for r in results if not isinstance(r, BaseException) for t in r)
+    print(f"   Conversations: {num_sessions - len(failures)} ok, {len(failures)} failed")
+    if latencies:
+        print(f"   Turns: {len(latencies)} in {elapsed:.1f}s ({len(latencies) / elapsed:.1f}/s)")
+        print(f"   Latency p50: {latencies[len(latencies) // 2]:.2f}s  "
+              f"p95: {latencies[int(len(latencies) * 0.95)]:.2f}s")
+    for failure in failures[:3]:
+        print(f"   Error: {failure}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python test_api.py --load N  runs N conversations concurrently instead of the interactive suite
+    if len(sys.argv) > 1 and sys.argv[1] == "--load":
+        asyncio.run(load_test(int(sys.argv[2]) if len(sys.argv) > 2 else 10))
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+from ConvSurveyAgent_Fixed import compile_deterministic_extractors, match_deterministic_fields
+
+PATTERN, GROUPS = compile_deterministic_extractors(["Budget", "Department", "Current Stage"])
+
+# Replies the regex pass should fill (field -> raw matched value)
+POSITIVE_CASES = [
+    ("Our budget is $500k", {"Budget": "$500k"}),
+    ("We have about 2 million in funding", {"Budget": "2 million"}),
+    ("Budget: $1.5M, run by the engineering team", {"Budget": "$1.5M", "Department": "engineering"}),
+    ("It's a 250k investment", {"Budget": "250k"}),
+    ("We're currently in production", {"Current Stage": "production"}),
+    ("It is in the pilot phase", {"Current Stage": "pilot"}),
+]
+
+# Numbers and stage words that aren't about the field - left to the LLM
+NEGATIVE_CASES = [
+    "Our chatbot serves 2 million customers",
+    "We handle 10k tickets a month",
+    "$500",
+    "Our budget is $500",
+    "used in production systems elsewhere",
+    "The model was trained on data already in development databases",
+]
+
+def test_deterministic_extraction():
+    """Test that the regex pass only fills fields when the reply names them"""
+
+    print("=== Positive cases ===")
+    for text, expected in POSITIVE_CASES:
+        result = match_deterministic_fields(PATTERN, GROUPS, text)
+        print(f"{text!r} -> {result}")
+        assert result == expected, f"{text!r}: expected {expected}, got {result}"
+
+    print("\n=== Negative cases ===")
+    for text in NEGATIVE_CASES:
+        result = match_deterministic_fields(PATTERN, GROUPS, text)
+        print(f"{text!r} -> {result}")
+        assert result == {}, f"{text!r}: expected no fields, got {result}"
+
+if __name__ == "__main__":
+    test_deterministic_extraction()
@@ -17,52 +17,44 @@ Thought 5: I should craft a question that builds on their "chat HWE" mention and
 Answer: Thank you for sharing that you're working on the "chat HWE" initiative. Could you tell me more about the specific type of AI technology you're using for this project? For example, are you leveraging large language models, traditional natural language processing, machine learning algorithms, or a combination of different AI approaches?"""
 
     # Test current extraction logic
+    def last_question(text, breaks):
+        """Text from the last break before the last '?' up to and including it (reverse scan)"""
+        q = text.rfind("?")
+        if q == -1:
+            return None
+        start = max(text.rfind(b, 0, q) for b in breaks) + 1
+        return text[start:q + 1].strip() or None
+
     def extract_answer_current(assistant_msg):
         """Current extraction logic from survey_api.py"""
         # Extract just the answer part
-        if "Answer:" in assistant_msg:
-            answer = assistant_msg.split("Answer:")[-1].strip()
+        _, marker, answer_part = assistant_msg.rpartition("Answer:")
+        if marker:
+            answer = answer_part.strip()
         elif "Thought 5:" in assistant_msg:
             # Fallback: extract the question from Thought 5 if no Answer section
-            thought5_section = assistant_msg.split("Thought 5:")[-1].strip()
-            # Look for a question at the end of Thought 5
-            if "?" in thought5_section:
-                # Extract the last sentence that ends with a question mark
-                sentences = thought5_section.split(".")
-                for sentence in reversed(sentences):
-                    if "?" in sentence:
-                        answer = sentence.strip()
-                        break
-                else:
-                    answer = thought5_section
-            else:
-                answer = thought5_section
+            thought5_section = assistant_msg.rpartition("Thought 5:")[2].strip()
+            answer = last_question(thought5_section, ".") or thought5_section
         else:
-            answer = assistant_msg
+            answer = last_question(assistant_msg, "\n") or assistant_msg
         return answer
 
     # Test improved extraction logic
     def extract_answer_improved(assistant_msg):
-        """Improved extraction logic"""
+        """Improved extraction logic: right-to-left scans, no intermediate lists"""
         # First try to find "Answer:" section
-        if "Answer:" in assistant_msg:
-            answer = assistant_msg.split("Answer:")[-1].strip()
-            return answer
+        i = assistant_msg.rfind("Answer:")
+        if i != -1:
+            return assistant_msg[i + len("Answer:"):].strip()
         
-        # If no Answer section, try to find the last question in the response
-        if "?" in assistant_msg:
-            # Split by sentences and find the last question
-            sentences = [s.strip() for s in assistant_msg.replace('\n', ' ').split('.') if s.strip()]
-            for sentence in reversed(sentences):
-                if "?" in sentence:
-                    return sentence.strip()
+        # If no Answer section, use the sentence ending at the last question mark
+        question = last_question(assistant_msg, ".!\n")
+        if question:
+            return question
         
         # Fallback: return the last non-empty line
-        lines = [line.strip() for line in assistant_msg.split('\n') if line.strip()]
-        if lines:
-            return lines[-1]
-        
-        return assistant_msg
+        stripped = assistant_msg.rstrip()
+        return stripped[stripped.rfind("\n") + 1:].strip() or assistant_msg
 
     # Test both approaches
     print("=== Testing Extraction Logic ===\n")
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+from extract import current_logic, simple_fix
+
 def test_simple_extraction_fix():
     """Test a simpler fix for the extraction logic"""
     
@@ -11,43 +13,6 @@ Thought 4: Business context insights.
 Thought 5: I should ask about the AI technology type.
 What specific type of AI technology are you using for this chat project?"""
 
-    # Current logic (problematic)
-    def current_logic(assistant_msg):
-        if "Answer:" in assistant_msg:
-            return assistant_msg.split("Answer:")[-1].strip()
-        elif "Thought 5:" in assistant_msg:
-            thought5_section = assistant_msg.split("Thought 5:")[-1].strip()
-            if "?" in thought5_section:
-                sentences = thought5_section.split(".")
-                for sentence in reversed(sentences):
-                    if "?" in sentence:
-                        return sentence.strip()
-                        break
-                else:
-                    return thought5_section
-            else:
-                return thought5_section
-        else:
-            return assistant_msg  # ❌ THIS IS THE PROBLEM - returns everything
-
-    # Simple fix - just find the last question
-    def simple_fix(assistant_msg):
-        # First try Answer: section
-        if "Answer:" in assistant_msg:
-            return assistant_msg.split("Answer:")[-1].strip()
-        
-        # If no Answer section, find the last question in the entire response
-        if "?" in assistant_msg:
-            # Find all sentences with questions
-            lines = assistant_msg.split('\n')
-            for line in reversed(lines):
-                if "?" in line and line.strip():
-                    return line.strip()
-        
-        # Fallback: return last non-empty line
-        lines = [line.strip() for line in assistant_msg.split('\n') if line.strip()]
-        return lines[-1] if lines else assistant_msg
-
     print("=== Testing Simple Fix ===\n")
     
     print("Input (no Answer section):")